@@ -0,0 +1,96 @@
+import argparse
+import glob
+import os
+import pickle
+import random
+import time
+import networkx as nx
+from routing import CSRGraph, ROUTING_STRATEGIES
+from contraction import ContractionHierarchy
+
+
+def run_queries(search, pairs, settled_counter=None):
+    """
+    Time a routing function over a list of node pairs.
+    :param search: Callable (origin, destination) -> route.
+    :param pairs: List of (origin, destination) node IDs.
+    :param settled_counter: Object exposing `last_settled` after each query, if any.
+    :return: Tuple (mean wall time in ms, mean nodes settled or None, number of unreachable pairs).
+    """
+    elapsed, settled, unreachable = 0.0, 0, 0
+    for origin, destination in pairs:
+        start = time.perf_counter()
+        try:
+            search(origin, destination)
+        except nx.NetworkXNoPath:
+            unreachable += 1
+        elapsed += time.perf_counter() - start
+        if settled_counter is not None:
+            settled += settled_counter.last_settled
+    mean_settled = settled / len(pairs) if settled_counter is not None else None
+    return elapsed * 1000 / len(pairs), mean_settled, unreachable
+
+
+def load_cached_graph(graph_path=None, cache_dir="graph_cache"):
+    """
+    Load a pickled networkx graph.
+    :param graph_path: Path to a pickled graph (default: first graph in cache_dir).
+    :param cache_dir: Graph cache directory, holding <key>.pkl graphs next to derived files
+                      such as <digest>.routes.pkl route caches.
+    :return: Tuple (graph path, networkx graph).
+    :raises FileNotFoundError: If no cached graph is found.
+    """
+    if graph_path is not None:
+        candidates = [graph_path]
+    else:
+        # Derived pickles have a second suffix (e.g. .routes.pkl)
+        candidates = sorted(
+            path for path in glob.glob(os.path.join(cache_dir, "*.pkl")) if os.path.basename(path).count(".") == 1
+        )
+    for path in candidates:
+        with open(path, "rb") as f:
+            graph = pickle.load(f)
+        if isinstance(graph, nx.Graph):
+            return path, graph
+        print(f"Skipping {path}: not a pickled graph.")
+    raise FileNotFoundError(f"No pickled graph found in {graph_path or cache_dir}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare routing strategies on a cached graph.")
+    parser.add_argument("--graph", help="Path to a pickled graph (default: first file in graph_cache/).")
+    parser.add_argument("--pairs", type=int, default=200, help="Number of random node pairs to route.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the node pairs.")
+    parser.add_argument("--contraction-hierarchy", action="store_true",
+                        help="Also build and benchmark a contraction hierarchy.")
+    args = parser.parse_args()
+
+    graph_path, graph = load_cached_graph(args.graph)
+    print(f"Graph {graph_path}: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+
+    router = CSRGraph.from_networkx(graph, weight="length")
+    random.seed(args.seed)
+    nodes = list(graph.nodes)
+    pairs = [tuple(random.sample(nodes, 2)) for _ in range(args.pairs)]
+
+    results = {
+        "networkx": run_queries(lambda o, d: nx.shortest_path(graph, o, d, weight="length"), pairs),
+    }
+    for strategy in ROUTING_STRATEGIES:
+        results[strategy] = run_queries(
+            lambda o, d, strategy=strategy: router.shortest_path(o, d, strategy=strategy), pairs, router
+        )
+    if args.contraction_hierarchy:
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(router)
+        print(f"Contraction hierarchy built in {time.perf_counter() - start:.1f} s")
+        results["contraction_hierarchy"] = run_queries(hierarchy.shortest_path, pairs, hierarchy)
+
+    print(f"\n{'strategy':<24}{'ms/query':>10}{'settled/query':>16}{'unreachable':>13}")
+    for name, (ms, settled, unreachable) in results.items():
+        settled_str = f"{settled:.0f}" if settled is not None else "-"
+        print(f"{name:<24}{ms:>10.2f}{settled_str:>16}{unreachable:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode="wb"):
+    """
+    Open a temporary file next to `path` and move it into place once the block completes.
+    Readers (including other processes) see either the previous file or the complete new one,
+    never a partially written file; if the block raises, the temporary file is removed.
+    :param path: Destination path.
+    :param mode: File mode ('wb' or 'w').
+    :return: Context manager yielding the open temporary file.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
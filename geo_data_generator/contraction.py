@@ -0,0 +1,299 @@
+import heapq
+import os
+import numpy as np
+import networkx as nx
+from cache_io import atomic_write
+
+
+class ContractionHierarchy:
+    def __init__(self, node_ids, rank, up_indptr, up_indices, up_weights, up_middles,
+                 down_indptr, down_indices, down_weights, down_middles):
+        """
+        Contraction hierarchy over a road network, answering shortest-path queries with a
+        bidirectional search that only relaxes edges towards higher-ranked nodes.
+        Every edge (original or shortcut) is stored at its lower-ranked endpoint:
+        - up_*: edges u -> x with rank[x] > rank[u], stored at u.
+        - down_*: edges y -> u with rank[y] > rank[u], stored at u (as y).
+        A middle of -1 marks an original edge; otherwise the edge is a shortcut via that node.
+        :param node_ids: Array of node IDs; position i is the internal index of the node.
+        :param rank: int32 array with the contraction order of each node.
+        """
+        self.node_ids = node_ids
+        self.rank = rank
+        self.up = (up_indptr, up_indices, up_weights, up_middles)
+        self.down = (down_indptr, down_indices, down_weights, down_middles)
+
+        self._node_list = node_ids.tolist()
+        self.node_index = {node: i for i, node in enumerate(self._node_list)}
+
+        # Number of nodes settled by the last query, for benchmarking
+        self.last_settled = 0
+
+        self._up = tuple(array.tolist() for array in self.up)
+        self._down = tuple(array.tolist() for array in self.down)
+
+        # (a, b) -> (weight, middle) for unpacking shortcuts
+        self._edges = {}
+        for u in range(len(self._node_list)):
+            indptr, indices, weights, middles = self._up
+            for e in range(indptr[u], indptr[u + 1]):
+                self._edges[(u, indices[e])] = (weights[e], middles[e])
+            indptr, indices, weights, middles = self._down
+            for e in range(indptr[u], indptr[u + 1]):
+                self._edges[(indices[e], u)] = (weights[e], middles[e])
+
+    @classmethod
+    def build(cls, csr_graph, witness_limit=200, hop_limit=5):
+        """
+        Contract every node of a CSR graph, ordered by edge difference with lazy updates.
+        :param csr_graph: routing.CSRGraph to preprocess.
+        :param witness_limit: Maximum nodes settled by each witness search; lower values add more
+                              (redundant but harmless) shortcuts and speed up preprocessing.
+        :param hop_limit: Maximum number of edges of a witness path, with the same trade-off.
+        :return: ContractionHierarchy instance.
+        """
+        n = len(csr_graph)
+        indptr, indices, weights = csr_graph._adjacency
+
+        # Remaining (uncontracted) graph: neighbour -> (weight, middle)
+        out_adj = [{} for _ in range(n)]
+        in_adj = [{} for _ in range(n)]
+        for u in range(n):
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v != u:
+                    out_adj[u][v] = (weights[e], -1)
+                    in_adj[v][u] = (weights[e], -1)
+
+        contracted = [False] * n
+        deleted_neighbours = [0] * n
+        rank = np.zeros(n, dtype=np.int32)
+        up_edges = [None] * n
+        down_edges = [None] * n
+
+        def witness_distances(source, excluded, max_distance, targets):
+            # Stops once every target is settled, or when the distance, settled or hop limit is reached
+            dist = {source: 0.0}
+            heap = [(0.0, 0, source)]
+            settled = 0
+            remaining = len(targets)
+            while heap and settled < witness_limit:
+                d, hops, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                if d > max_distance:
+                    break
+                settled += 1
+                if u in targets:
+                    remaining -= 1
+                    if not remaining:
+                        break
+                if hops == hop_limit:
+                    continue
+                for v, (w, _) in out_adj[u].items():
+                    if v == excluded:
+                        continue
+                    nd = d + w
+                    if nd < dist.get(v, float("inf")):
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, hops + 1, v))
+            return dist
+
+        def shortcuts_for(v):
+            shortcuts = []
+            if not in_adj[v] or not out_adj[v]:
+                return shortcuts
+            max_out = max(w for w, _ in out_adj[v].values())
+            for u, (w_uv, _) in in_adj[v].items():
+                targets = out_adj[v].keys() - {u}
+                if not targets:
+                    continue
+                dist = witness_distances(u, v, w_uv + max_out, targets)
+                for x, (w_vx, _) in out_adj[v].items():
+                    if x == u:
+                        continue
+                    via = w_uv + w_vx
+                    if dist.get(x, float("inf")) > via:
+                        shortcuts.append((u, x, via))
+            return shortcuts
+
+        def priority(v):
+            # Edge difference plus contracted neighbours; also returns the shortcuts contracting v would add
+            shortcuts = shortcuts_for(v)
+            return len(shortcuts) - len(in_adj[v]) - len(out_adj[v]) + deleted_neighbours[v], shortcuts
+
+        heap = [(priority(v)[0], v) for v in range(n)]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-evaluate and postpone if no longer the cheapest
+            current, shortcuts = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            for u, x, via in shortcuts:
+                if via < out_adj[u].get(x, (float("inf"), -1))[0]:
+                    out_adj[u][x] = (via, v)
+                    in_adj[x][u] = (via, v)
+
+            # Freeze the remaining edges of v: all lead to nodes contracted later
+            up_edges[v] = [(x, w, m) for x, (w, m) in out_adj[v].items()]
+            down_edges[v] = [(u, w, m) for u, (w, m) in in_adj[v].items()]
+            for x in out_adj[v]:
+                del in_adj[x][v]
+                deleted_neighbours[x] += 1
+            for u in in_adj[v]:
+                del out_adj[u][v]
+                deleted_neighbours[u] += 1
+            out_adj[v], in_adj[v] = {}, {}
+
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+
+        return cls(csr_graph.node_ids, rank, *_to_arrays(up_edges), *_to_arrays(down_edges))
+
+    @classmethod
+    def load_or_build(cls, csr_graph, cache_path):
+        """
+        Load a cached hierarchy for this graph, or build and cache it.
+        :param csr_graph: routing.CSRGraph the hierarchy belongs to.
+        :param cache_path: Path of the .npz file stored alongside the pickled graph.
+        :return: ContractionHierarchy instance.
+        """
+        if os.path.exists(cache_path):
+            print(f"Loading contraction hierarchy from cache: {cache_path}")
+            return cls.load(cache_path)
+        print(f"Building contraction hierarchy for {len(csr_graph)} nodes...")
+        hierarchy = cls.build(csr_graph)
+        hierarchy.save(cache_path)
+        print(f"Contraction hierarchy saved to cache: {cache_path}")
+        return hierarchy
+
+    def save(self, path):
+        """
+        Save the hierarchy arrays to an .npz file.
+        :param path: Destination path.
+        """
+        with atomic_write(path) as f:
+            np.savez(
+                f, node_ids=self.node_ids, rank=self.rank,
+                up_indptr=self.up[0], up_indices=self.up[1], up_weights=self.up[2], up_middles=self.up[3],
+                down_indptr=self.down[0], down_indices=self.down[1], down_weights=self.down[2], down_middles=self.down[3],
+            )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load hierarchy arrays saved with `save`.
+        :param path: Path of the .npz file.
+        :return: ContractionHierarchy instance.
+        """
+        with np.load(path) as data:
+            return cls(
+                data["node_ids"], data["rank"],
+                data["up_indptr"], data["up_indices"], data["up_weights"], data["up_middles"],
+                data["down_indptr"], data["down_indices"], data["down_weights"], data["down_middles"],
+            )
+
+    def shortest_path(self, source, target):
+        """
+        Bidirectional upward search, then unpack the shortcuts of the best path.
+        :param source: Node ID of the origin.
+        :param target: Node ID of the destination.
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the distance to route_nodes[i].
+        :raises nx.NodeNotFound: If either node is not in the graph.
+        :raises nx.NetworkXNoPath: If the destination is unreachable.
+        """
+        for node in (source, target):
+            if node not in self.node_index:
+                raise nx.NodeNotFound(f"Node {node} not in graph")
+        s, t = self.node_index[source], self.node_index[target]
+
+        # Each search relaxes edges towards higher-ranked nodes, and checks the edges from higher-ranked
+        # nodes in the opposite direction to stall on demand: a node reached more cheaply through a
+        # higher-ranked node is not on a shortest up-down path, so its edges are not relaxed
+        searches = (
+            ({s: 0.0}, {s: -1}, [(0.0, s)], self._up, self._down),
+            ({t: 0.0}, {t: -1}, [(0.0, t)], self._down, self._up),
+        )
+        best, meeting = float("inf"), -1
+        side = 0
+        settled = 0
+        while True:
+            # A search stops once its frontier cannot improve the best meeting point
+            active = [bool(queue) and queue[0][0] < best for _, _, queue, _, _ in searches]
+            if not any(active):
+                break
+            if not active[side]:
+                side = 1 - side
+            dist, pred, queue, (indptr, indices, weights, _), (stall_indptr, stall_indices, stall_weights, _) = searches[side]
+            other_dist = searches[1 - side][0]
+
+            d, u = heapq.heappop(queue)
+            if d <= dist[u]:
+                settled += 1
+                if u in other_dist and d + other_dist[u] < best:
+                    best, meeting = d + other_dist[u], u
+                if any(
+                    dist.get(stall_indices[e], float("inf")) + stall_weights[e] < d
+                    for e in range(stall_indptr[u], stall_indptr[u + 1])
+                ):
+                    side = 1 - side
+                    continue
+                for e in range(indptr[u], indptr[u + 1]):
+                    v = indices[e]
+                    nd = d + weights[e]
+                    if nd < dist.get(v, float("inf")):
+                        dist[v] = nd
+                        pred[v] = u
+                        heapq.heappush(queue, (nd, v))
+            side = 1 - side
+
+        self.last_settled = settled
+        if meeting == -1:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+        forward_pred, backward_pred = searches[0][1], searches[1][1]
+        upward = [meeting]
+        while forward_pred[upward[-1]] != -1:
+            upward.append(forward_pred[upward[-1]])
+        upward.reverse()
+        downward = [meeting]
+        while backward_pred[downward[-1]] != -1:
+            downward.append(backward_pred[downward[-1]])
+        hierarchy_path = upward + downward[1:]
+
+        path, cumulative = [s], [0.0]
+        for a, b in zip(hierarchy_path, hierarchy_path[1:]):
+            self._unpack(a, b, path, cumulative)
+        return [self._node_list[i] for i in path], cumulative
+
+    def _unpack(self, a, b, path, cumulative):
+        # Iterative unpacking to avoid deep recursion on long shortcut chains
+        stack = [(a, b)]
+        while stack:
+            u, v = stack.pop()
+            weight, middle = self._edges[(u, v)]
+            if middle == -1:
+                path.append(v)
+                cumulative.append(cumulative[-1] + weight)
+            else:
+                stack.append((middle, v))
+                stack.append((u, middle))
+
+
+def _to_arrays(edge_lists):
+    """Pack per-node edge lists [(neighbour, weight, middle), ...] into CSR arrays."""
+    counts = np.fromiter((len(edges) for edges in edge_lists), dtype=np.int32, count=len(edge_lists))
+    indptr = np.zeros(len(edge_lists) + 1, dtype=np.int32)
+    np.cumsum(counts, out=indptr[1:])
+    flat = [edge for edges in edge_lists for edge in edges]
+    indices = np.fromiter((e[0] for e in flat), dtype=np.int32, count=len(flat))
+    weights = np.fromiter((e[1] for e in flat), dtype=np.float32, count=len(flat))
+    middles = np.fromiter((e[2] for e in flat), dtype=np.int32, count=len(flat))
+    return indptr, indices, weights, middles
@@ -17,7 +17,7 @@ from common import (
     PERSON_TYPE_MAPPING,
     SPEED_RANGES,
 )
-from osm_integration import OSMManager
+from osm_integration import get_osm_manager
 
 # Initialize the Dash app
 app = Dash(__name__)
@@ -80,7 +80,7 @@ def update_center_by_city(n_clicks, city_name):
         raise PreventUpdate
 
     lat, lon = get_city_center(city_name)
-    osm_manager = OSMManager(center_point=(lat, lon), radius=10000)
+    osm_manager = get_osm_manager(center_point=(lat, lon), radius=10000)
     return f"Center point set to: ({lat}, {lon})", [lat, lon]
 
 
@@ -159,7 +159,7 @@ def get_current_position(n_clicks, time_str, person_data, children):
 
     # Deserialize the person instance and calculate the position
     person_instance = Person.from_dict(person_data, osm_manager)
-    current_position, log = person_instance.get_position_at_time(current_time)
+    current_position, log = person_instance.get_position_at_time(current_time, trace=True)
 
     # Highlight the route and position on the map
     current_route = [
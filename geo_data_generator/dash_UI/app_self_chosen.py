@@ -17,7 +17,7 @@ from common import (
     SPEED_RANGES,
 )
 from models.person import Person
-from osm_integration import OSMManager
+from osm_integration import get_osm_manager
 
 # Initialize app
 app = dash.Dash(__name__)
@@ -141,7 +141,7 @@ def update_center_by_city(n_clicks, city_name):
     if not city_name:
         raise PreventUpdate
     lat, lon = get_city_center(city_name)
-    osm_manager = OSMManager(center_point=(lat, lon), radius=10000)
+    osm_manager = get_osm_manager(center_point=(lat, lon), radius=10000)
     return f"City center set to: {city_name} ({lat}, {lon})", [lat, lon]
 
 @app.callback(
@@ -314,7 +314,7 @@ def get_current_position(n_clicks, time_str, person_data, children):
 
     # Deserialize the person instance and calculate the position
     person_instance = Person.from_dict(person_data, osm_manager)
-    current_position, log = person_instance.get_position_at_time(current_time)
+    current_position, log = person_instance.get_position_at_time(current_time, trace=True)
 
     # Highlight the route and position on the map
     current_route = [
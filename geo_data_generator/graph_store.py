@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import numpy as np
+from cache_io import atomic_write
+from routing import CSRGraph
+
+FORMAT_VERSION = 1
+
+# Arrays always present in a compact graph cache directory
+GRAPH_ARRAYS = ("node_ids", "lats", "lons", "indptr", "indices", "weights", "components")
+
+
+def has_graph_arrays(directory):
+    """
+    Check whether a compact graph cache exists in a directory.
+    :param directory: Cache directory for one graph (e.g. graph_cache/<key>).
+    :return: True if all required arrays and metadata are present.
+    """
+    return os.path.exists(os.path.join(directory, "meta.json")) and all(
+        os.path.exists(os.path.join(directory, f"{name}.npy")) for name in GRAPH_ARRAYS
+    )
+
+
+def graph_digest(csr_graph):
+    """
+    Hash of a graph's contents (nodes, edges and weights), naming the caches derived from it.
+    A graph cropped from a larger cached region gets a different digest than one downloaded for
+    the same request, so derived caches are never shared between them.
+    :param csr_graph: routing.CSRGraph.
+    :return: Hex digest string.
+    """
+    digest = hashlib.md5(csr_graph.weight.encode())
+    for array in (csr_graph.node_ids, csr_graph.indptr, csr_graph.indices, csr_graph.weights):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def save_graph_arrays(directory, csr_graph, components, crs=None):
+    """
+    Save a graph as flat .npy arrays that can later be memory-mapped.
+    :param directory: Destination directory (created if needed).
+    :param csr_graph: routing.CSRGraph to save (must have lats/lons).
+    :param components: Strongly connected component id of every node.
+    :param crs: CRS of the coordinates, stored in the metadata.
+    Every file is written atomically and the metadata last, so a concurrent reader never
+    sees a partial cache: has_graph_arrays only succeeds once all arrays are in place.
+    """
+    os.makedirs(directory, exist_ok=True)
+    arrays = {
+        "node_ids": csr_graph.node_ids,
+        "lats": csr_graph.lats,
+        "lons": csr_graph.lons,
+        "indptr": csr_graph.indptr,
+        "indices": csr_graph.indices,
+        "weights": csr_graph.weights,
+        "components": np.asarray(components, dtype=np.int32),
+    }
+    for name, array in arrays.items():
+        with atomic_write(os.path.join(directory, f"{name}.npy")) as f:
+            np.save(f, np.ascontiguousarray(array))
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "weight": csr_graph.weight,
+        "crs": crs,
+        "nodes": len(csr_graph),
+        "edges": len(csr_graph.indices),
+    }
+    with atomic_write(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def load_graph_arrays(directory, mmap=True):
+    """
+    Load a compact graph cache.
+    :param directory: Directory written by save_graph_arrays.
+    :param mmap: Whether to memory-map the arrays (read-only, shared through the page cache).
+    :return: Tuple (csr_graph, components, meta).
+    """
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported graph cache version {meta.get('version')} in {directory}.")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in GRAPH_ARRAYS
+    }
+    csr_graph = CSRGraph(
+        arrays["node_ids"], arrays["indptr"], arrays["indices"], arrays["weights"],
+        weight=meta["weight"], lats=arrays["lats"], lons=arrays["lons"],
+    )
+    return csr_graph, arrays["components"], meta
+
+
+def crop_graph_arrays(csr_graph, keep):
+    """
+    Extract the subgraph induced by a subset of nodes, entirely on arrays.
+    :param csr_graph: routing.CSRGraph to crop.
+    :param keep: Boolean mask over the nodes of csr_graph.
+    :return: Cropped CSRGraph.
+    """
+    keep = np.asarray(keep, dtype=bool)
+    n = len(csr_graph)
+    new_index = np.full(n, -1, dtype=np.int32)
+    new_index[keep] = np.arange(np.count_nonzero(keep), dtype=np.int32)
+
+    # Edges are sorted by source, and the renumbering preserves order, so the CSR layout carries over
+    sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(csr_graph.indptr))
+    edge_keep = keep[sources] & keep[csr_graph.indices]
+    new_sources = new_index[sources[edge_keep]]
+    indptr = np.zeros(len(new_index[keep]) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(new_sources, minlength=len(indptr) - 1), out=indptr[1:])
+
+    return CSRGraph(
+        np.asarray(csr_graph.node_ids)[keep], indptr,
+        new_index[np.asarray(csr_graph.indices)[edge_keep]], np.asarray(csr_graph.weights)[edge_keep],
+        weight=csr_graph.weight, lats=np.asarray(csr_graph.lats)[keep], lons=np.asarray(csr_graph.lons)[keep],
+    )
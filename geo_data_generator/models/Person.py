@@ -1,9 +1,51 @@
 
+from datetime import datetime, time
+from functools import cached_property
+import numpy as np
+from .movement import Movement, seconds_to_time, time_to_seconds
 from .waypoint_manager import AutoWaypointAssigner, ManualWaypointAssigner
-from datetime import datetime, timedelta, time
+
+# Version of the binary form written by Person.to_bytes
+BINARY_FORMAT_VERSION = 1
+
+
+def seconds_of_day(timestamps):
+    """
+    Convert timestamps to seconds since midnight.
+    :param timestamps: Sequence of datetime/time objects, or array of numpy datetime64.
+    :return: float64 array of seconds.
+    """
+    if isinstance(timestamps, np.ndarray) and np.issubdtype(timestamps.dtype, np.datetime64):
+        return (timestamps - timestamps.astype("datetime64[D]")) / np.timedelta64(1, "s")
+    seconds = []
+    for t in timestamps:
+        t = t.time() if isinstance(t, datetime) else t
+        seconds.append(t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6)
+    return np.array(seconds, dtype=np.float64)
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("The binary person format requires msgpack: pip install msgpack") from None
+    return msgpack
+
+
+def _msgpack_default(obj):
+    # numpy scalars (e.g. sampled waypoint coordinates or ids) are packed as Python numbers
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}.")
+
+
+def _pack(arrays, dtype):
+    """Concatenate arrays into the raw bytes of one array of the given dtype."""
+    return np.concatenate(arrays).astype(dtype).tobytes() if arrays else b""
+
 
 class Person:
-    def __init__(self, unique_id, person_type, speed, osm_manager, predefined_waypoints={}, schedule=[], detail_schedule=[], mode="automatic"):
+    def __init__(self, unique_id, person_type, speed, osm_manager, predefined_waypoints={}, schedule=[], detail_schedule=[], mode="automatic", defer_trajectories=False):
         """
         A Person in the simulation with assigned waypoints such as home, workplace, etc.
         
@@ -15,13 +57,14 @@ class Person:
         :param schedule: Predefined schedule, if any (default is None).
         :param detail_schedule: Predefined detailed schedule, if any (default is None).
         :param mode: Mode of waypoint assignment ('automatic' or 'self_chosen').
+        :param defer_trajectories: If True, leave `detail_schedule` empty so the caller can
+                                   fill it with `apply_trajectories` (e.g. after batched routing).
         """
         self.osm_manager = osm_manager
         self.unique_id = unique_id
         self.type = person_type
         self.speed = speed
         self.mode = mode
-        self.waypoint_assigner = self._select_waypoint_assigner()
         
         # Waypoints and schedules
         self.waypoints = predefined_waypoints
@@ -36,7 +79,20 @@ class Person:
         self.build_general_schedule()
 
         # Build detailed trajectories
-        self.detail_schedule = detail_schedule if detail_schedule else self.build_trajectories()
+        if detail_schedule:
+            self.detail_schedule = [
+                movement if isinstance(movement, Movement) else Movement.from_dict(movement, self.osm_manager.route_table)
+                for movement in detail_schedule
+            ]
+        elif defer_trajectories:
+            self.detail_schedule = []
+        else:
+            self.detail_schedule = self.build_trajectories()
+
+    @cached_property
+    def waypoint_assigner(self):
+        """Waypoint assigner of the person's mode (created on first use for restored people)."""
+        return self._select_waypoint_assigner()
 
     def _select_waypoint_assigner(self):
         """
@@ -186,34 +242,37 @@ class Person:
         """
         Compute and store the trajectory for each movement in the schedule, using only time objects.
         """
-        enriched_schedule = []
-        for movement in self.schedule:
-            start_time = movement["start_time"]
+        trajectories = [
+            self.osm_manager.build_trajectory(start_coords, end_coords, self.speed)
+            for start_coords, end_coords in self.movement_endpoints()
+        ]
+        return self.apply_trajectories(trajectories)
 
-            # Get start and end waypoints
-            start_coords = self.waypoints[movement["start_waypoint"]]
-            end_coords = self.waypoints[movement["end_waypoint"]]
+    def movement_endpoints(self):
+        """
+        List the (start, end) coordinates of each movement in the schedule.
+        :return: List of tuples ((latitude, longitude), (latitude, longitude)).
+        """
+        return [
+            (self.waypoints[movement["start_waypoint"]], self.waypoints[movement["end_waypoint"]])
+            for movement in self.schedule
+        ]
 
-            # Build trajectory using OSMManager
-            trajectory = self.osm_manager.build_trajectory(start_coords, end_coords, self.speed)
-            
-            # Calculate arrival time as general time
-            travel_time = timedelta(seconds=trajectory["travel_time_s"])
-            arrival_datetime = datetime.combine(datetime.today(), start_time) + travel_time
-            arrival_time = arrival_datetime.time()  # Extract only the time part
-
-            # Enrich the schedule entry with trajectory details
-            enriched_schedule.append({
-                "start_waypoint": movement["start_waypoint"],
-                "end_waypoint": movement["end_waypoint"],
-                "start_time": start_time,  
-                "route_nodes": trajectory["route_nodes"],
-                "distance_m": trajectory["distance_m"],
-                "travel_time_s": trajectory["travel_time_s"],
-                "arrival_time": arrival_time, 
-            })
-
-        return enriched_schedule
+    def apply_trajectories(self, trajectories):
+        """
+        Enrich the schedule with precomputed trajectories and store it as `detail_schedule`.
+        The routes are stored once in the manager's population-wide route table.
+        :param trajectories: List of trajectory dictionaries from OSMManager, one per movement.
+        :return: The detailed schedule, as a list of Movement records.
+        """
+        self.detail_schedule = [
+            Movement.from_trajectory(
+                movement["start_waypoint"], movement["end_waypoint"], movement["start_time"],
+                trajectory, self.osm_manager.route_table,
+            )
+            for movement, trajectory in zip(self.schedule, trajectories)
+        ]
+        return self.detail_schedule
 
     ### Without UI ###
     # def get_position_at_time(self, current_time):
@@ -263,96 +322,120 @@ class Person:
     #     return final_position
 
     ### With UI ###
-    def get_position_at_time(self, current_time):
+    def get_position_at_time(self, current_time, trace=False):
         """
-        Determine the position of the person at a specific time and generate a log.
+        Determine the position of the person at a specific time, optionally with a log.
         :param current_time: A datetime object in the format 'YYYY-MM-DD HH:mm:ss'.
+        :param trace: Whether to build and print a log of how the position was found (used by the UI).
+                      Without it no string is formatted nor printed.
         :return: Tuple containing:
             - (latitude, longitude) representing the person's position.
-            - Detailed log string.
+            - Detailed log string, or None without trace.
         """
-        current_time_only = current_time.time()
-        log = f"Checking position at time: {current_time_only} \n"
-        print(f"Checking position at time: {current_time_only}")
-
-        for i, movement in enumerate(self.detail_schedule):
-            start_time = movement["start_time"]
-            arrival_time = movement["arrival_time"]
-            log += f"Movement {i}: {movement['start_waypoint']} → {movement['end_waypoint']} \n"
-            log += f"    Start time: {start_time}, Arrival time: {arrival_time} \n"
-            print(f"Movement {i}: {movement['start_waypoint']} → {movement['end_waypoint']}")
-            print(f"    Start time: {start_time}, Arrival time: {arrival_time}")
-
-            if start_time <= current_time_only <= arrival_time:
-                elapsed_time_s = (
-                    datetime.combine(datetime.today(), current_time_only) -
-                    datetime.combine(datetime.today(), start_time)
-                ).total_seconds()
-                fraction_traveled = elapsed_time_s / movement["travel_time_s"]
+        positions, movements, elapsed_s = self._locate_times(seconds_of_day([current_time]))
+        i, elapsed_time_s = int(movements[0]), float(elapsed_s[0])
+        if i == len(self.detail_schedule):
+            position = self.waypoints[self.detail_schedule[-1].end_waypoint]
+        elif elapsed_time_s < 0:
+            position = self.waypoints[self.detail_schedule[i].start_waypoint]
+        else:
+            position = tuple(map(float, positions[0]))
+        if not trace:
+            return position, None
 
+        log = f"Checking position at time: {current_time.time()} \n"
+        if i == len(self.detail_schedule):
+            log += f"All movements completed. Returning final position: {position} \n"
+        else:
+            movement = self.detail_schedule[i]
+            log += f"Movement {i}: {movement.start_waypoint} → {movement.end_waypoint} \n"
+            log += f"    Start time: {movement.start_time}, Arrival time: {movement.arrival_time} \n"
+            if elapsed_time_s < 0:
+                log += f"    Current time is before this movement. Returning start waypoint: {movement.start_waypoint} \n"
+            else:
                 log += f"    Elapsed time: {elapsed_time_s} seconds\n"
-                log += f"    Fraction of route traveled: {fraction_traveled:.2f} \n"
-                print(f"    Elapsed time: {elapsed_time_s} seconds")
-                print(f"    Fraction of route traveled: {fraction_traveled:.2f}")
-
-                interpolated_position = self.interpolate_position(
-                    movement["route_nodes"], fraction_traveled, movement["distance_m"]
-                )
-                interpolated_position = (float(interpolated_position[0]), float(interpolated_position[1]))
-                log += f"    Interpolated position: {interpolated_position}\n"
-                print(f"    Interpolated position: {interpolated_position}")
-                return interpolated_position, log
-
-            elif current_time_only < start_time:
-                log += f"    Current time is before this movement. Returning start waypoint: {movement['start_waypoint']} \n"
-                print(f"    Current time is before this movement. Returning start waypoint: {movement['start_waypoint']}")
-                
-                return self.waypoints[movement["start_waypoint"]], log
-
-        final_position = self.waypoints[self.detail_schedule[-1]["end_waypoint"]]
-        log += f"All movements completed. Returning final position: {final_position} \n"
-        print(f"All movements completed. Returning final position: {final_position}")
-
-        return final_position, log
-    
-    def interpolate_position(self, route_nodes, fraction, total_distance):
+                fraction = min(elapsed_time_s / movement.travel_time_s, 1.0) if movement.travel_time_s > 0 else 1.0
+                log += f"    Fraction of route traveled: {fraction:.2f} \n"
+                log += f"    Interpolated position: {position}\n"
+        print(log, end="")
+        return position, log
+
+    def get_positions_at_times(self, timestamps):
         """
-        Interpolate the position along the route using straight-line distance between nodes.
-        :param route_nodes: List of node IDs representing the route.
-        :param fraction: Fraction of the route completed (0 to 1).
-        :param total_distance: Precomputed total distance of the route in meters.
-        :return: Tuple (latitude, longitude) representing the interpolated position.
+        Determine the positions of the person at many times at once.
+        Only the time of day of each timestamp is used, as in get_position_at_time.
+        :param timestamps: Sequence of datetime/time objects, or array of numpy datetime64.
+        :return: (N, 2) float64 array of (latitude, longitude).
         """
-        target_distance = fraction * total_distance
-
-        cumulative_distance = 0
-        for i in range(len(route_nodes) - 1):
-            node_a, node_b = route_nodes[i], route_nodes[i + 1]
-
-            # Get coordinates of the nodes
-            coords_a = (self.osm_manager.nodes.loc[node_a, "y"], self.osm_manager.nodes.loc[node_a, "x"])
-            coords_b = (self.osm_manager.nodes.loc[node_b, "y"], self.osm_manager.nodes.loc[node_b, "x"])
-
-            # Calculate the straight-line distance between the nodes
-            segment_distance = self.osm_manager.straight_line_distance(coords_a, coords_b)
+        positions, _, _ = self._locate_times(seconds_of_day(timestamps))
+        return positions
 
-            if cumulative_distance + segment_distance >= target_distance:
-                # Interpolate between node_a and node_b
-                remaining_distance = target_distance - cumulative_distance
-                interpolation_fraction = remaining_distance / segment_distance
-
-                lat = coords_a[0] + (coords_b[0] - coords_a[0]) * interpolation_fraction
-                lon = coords_a[1] + (coords_b[1] - coords_a[1]) * interpolation_fraction
-                return lat, lon
-
-            cumulative_distance += segment_distance
-
-        # Fallback: Return the last node's coordinates
-        last_node = route_nodes[-1]
-        return (
-            self.osm_manager.nodes.loc[last_node, "y"],
-            self.osm_manager.nodes.loc[last_node, "x"]
-        )
+    def _locate_times(self, seconds):
+        """
+        Find the movement under way (or the next one) at each time and the position of the person.
+        A time belongs to the first movement it does not come after: if the movement has started
+        the position is interpolated along its route, otherwise the person is at its start waypoint.
+        :param seconds: Array of times as seconds since midnight.
+        :return: Tuple (positions (N, 2) array, movement indexes (len(detail_schedule) once all
+                 movements are completed), seconds elapsed since the movement started (negative before it)).
+        """
+        schedule = self.detail_schedule
+        seconds = np.asarray(seconds, dtype=np.float64)
+        starts = np.array([movement.start_s for movement in schedule], dtype=np.float64)
+        arrivals = np.array([movement.arrival_s for movement in schedule], dtype=np.float64)
+
+        # Last time each movement can be selected at; a movement arriving after midnight
+        # only catches the times before it starts
+        ends = np.where(arrivals >= starts, arrivals, np.nextafter(starts, -np.inf))
+        movements = np.searchsorted(np.maximum.accumulate(ends), seconds, side="left")
+
+        positions = np.empty((len(seconds), 2), dtype=np.float64)
+        elapsed_s = np.full(len(seconds), np.nan)
+        completed = movements == len(schedule)
+        if completed.any():
+            positions[completed] = self.waypoints[schedule[-1].end_waypoint]
+
+        selected = np.flatnonzero(~completed)
+        if not len(selected):
+            return positions, movements, elapsed_s
+        m = movements[selected]
+        elapsed_s[selected] = seconds[selected] - starts[m]
+        waiting = elapsed_s[selected] < 0
+        start_points = np.array([self.waypoints[movement.start_waypoint] for movement in schedule], dtype=np.float64)
+        positions[selected[waiting]] = start_points[m[waiting]]
+
+        # Interpolate along the routes, flattened into one array with an offset per movement
+        moving, m = selected[~waiting], m[~waiting]
+        if not len(moving):
+            return positions, movements, elapsed_s
+        routes = [movement.route_id for movement in schedule]
+        table = schedule[0].routes
+        lengths = np.diff(table.offsets)[routes]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        cumulative_m = np.concatenate([table.cumulative_m(route_id) for route_id in routes])
+        lats = np.concatenate([table.coordinates(route_id)[0] for route_id in routes])
+        lons = np.concatenate([table.coordinates(route_id)[1] for route_id in routes])
+        totals = cumulative_m[offsets[1:] - 1]
+        travel_times = np.array([movement.travel_time_s for movement in schedule], dtype=np.float64)
+
+        # Movements taking no time (e.g. between two waypoints snapped to the same node) are already over
+        progress = np.ones(len(moving))
+        np.divide(elapsed_s[moving], travel_times[m], out=progress, where=travel_times[m] > 0)
+        target_distance = np.clip(progress, 0.0, 1.0) * totals[m]
+        # Shifting each route by the length of the ones before keeps the flat array sorted
+        shift = np.concatenate(([0.0], np.cumsum(totals)))[:-1]
+        i = np.searchsorted(cumulative_m + np.repeat(shift, lengths), target_distance + shift[m], side="right")
+        i = np.clip(i, offsets[m] + 1, offsets[m + 1] - 1)
+
+        # Routes of a single point stay on it
+        single = lengths[m] == 1
+        i[single] = offsets[m][single]
+        segment_distance = cumulative_m[i] - cumulative_m[i - 1]
+        fraction = np.ones(len(i))
+        np.divide(target_distance - cumulative_m[i - 1], segment_distance, out=fraction, where=(segment_distance > 0) & ~single)
+        positions[moving, 0] = lats[i - 1] + (lats[i] - lats[i - 1]) * fraction
+        positions[moving, 1] = lons[i - 1] + (lons[i] - lons[i - 1]) * fraction
+        return positions, movements, elapsed_s
     
 
 ######################## Serialization and Deserialization ######################## 
@@ -373,37 +456,23 @@ class Person:
                 }
                 for movement in self.schedule
             ],
-            "detail_schedule": [
-                {
-                    "start_waypoint": movement["start_waypoint"],
-                    "end_waypoint": movement["end_waypoint"],
-                    "start_time": movement["start_time"].strftime("%H:%M:%S"),
-                    "route_nodes": movement["route_nodes"],
-                    "distance_m": movement["distance_m"],
-                    "travel_time_s": movement["travel_time_s"],
-                    "arrival_time": movement["arrival_time"].strftime("%H:%M:%S"),
-                }
-                for movement in self.detail_schedule
-            ],
+            "detail_schedule": [movement.to_dict() for movement in self.detail_schedule],
         }
 
     @classmethod
     def from_dict(cls, data, osm_manager):
         """
         Deserialize a dictionary to a Person object.
+        The person is restored as it was saved: waypoints are not reassigned and the schedule
+        is not rebuilt (subclasses do not replace it).
 
         :param data: A dictionary representing a serialized Person object.
         :param osm_manager: An OSMManager instance for geographic and route data.
         :return: A deserialized Person object (or its subclass).
         """
-
-        # Create an instance with basic fields
-        instance = cls(
-            unique_id=data["unique_id"],
-            person_type=data["type"],
-            speed=data["speed"],
-            osm_manager=osm_manager,
-            predefined_waypoints = data["waypoints"],
+        routes = osm_manager.route_table
+        return cls._restore(
+            osm_manager, data["unique_id"], data["type"], data["speed"], data["mode"], data["waypoints"],
             schedule=[
                 {
                     "start_waypoint": movement["start_waypoint"],
@@ -412,19 +481,113 @@ class Person:
                 }
                 for movement in data["schedule"]
             ],
-            detail_schedule=[
-                {
-                    "start_waypoint": movement["start_waypoint"],
-                    "end_waypoint": movement["end_waypoint"],
-                    "start_time": datetime.strptime(movement["start_time"], "%H:%M:%S").time(),
-                    "route_nodes": movement["route_nodes"],  # Already serializable
-                    "distance_m": movement["distance_m"],
-                    "travel_time_s": movement["travel_time_s"],
-                    "arrival_time": datetime.strptime(movement["arrival_time"], "%H:%M:%S").time(),
-                }
-                for movement in data["detail_schedule"]
-            ],
-            mode=data["mode"],
+            detail_schedule=[Movement.from_dict(movement, routes) for movement in data["detail_schedule"]],
         )
 
-        return instance
\ No newline at end of file
+    @classmethod
+    def _restore(cls, osm_manager, unique_id, person_type, speed, mode, waypoints, schedule, detail_schedule):
+        """Build a person from its saved state, without running the constructor."""
+        instance = cls.__new__(cls)
+        instance.osm_manager = osm_manager
+        instance.unique_id = unique_id
+        instance.type = person_type
+        instance.speed = speed
+        instance.mode = mode
+        instance.waypoints = waypoints
+        instance.schedule = schedule
+        instance.detail_schedule = detail_schedule
+        return instance
+
+    def to_bytes(self):
+        """
+        Serialize the Person object to a compact binary form (msgpack, with the movements and
+        routes packed as arrays). Requires msgpack.
+        :return: bytes.
+        """
+        msgpack = _import_msgpack()
+        movements = self.detail_schedule
+        is_points, route_nodes, route_points, cumulative_m = [], [], [], []
+        for movement in movements:
+            routes, route_id = movement.routes, movement.route_id
+            is_points.append(routes.is_points[route_id])
+            if is_points[-1]:
+                route_points.append(np.column_stack(routes.coordinates(route_id)))
+            else:
+                route_nodes.append(np.asarray(routes.nodes(route_id), dtype=np.int64))
+            cumulative_m.append(routes.cumulative_m(route_id))
+
+        return msgpack.packb({
+            "version": BINARY_FORMAT_VERSION,
+            "unique_id": self.unique_id,
+            "type": self.type,
+            "speed": self.speed,
+            "mode": self.mode,
+            "waypoints": self.waypoints,
+            "schedule": [
+                [movement["start_waypoint"], movement["end_waypoint"], time_to_seconds(movement["start_time"])]
+                for movement in self.schedule
+            ],
+            "movements": {
+                "start_waypoint": [movement.start_waypoint for movement in movements],
+                "end_waypoint": [movement.end_waypoint for movement in movements],
+                "start_s": np.array([movement.start_s for movement in movements], dtype=np.int32).tobytes(),
+                "arrival_s": np.array([movement.arrival_s for movement in movements], dtype=np.int32).tobytes(),
+                "distance_m": np.array([movement.distance_m for movement in movements], dtype=np.float64).tobytes(),
+                "travel_time_s": np.array([movement.travel_time_s for movement in movements], dtype=np.float64).tobytes(),
+                "route_lengths": np.array([len(distances) for distances in cumulative_m], dtype=np.int64).tobytes(),
+                "route_is_points": np.array(is_points, dtype=bool).tobytes(),
+                "route_nodes": _pack(route_nodes, np.int64),
+                "route_points": _pack(route_points, np.float64),
+                "cumulative_m": _pack(cumulative_m, np.float32),
+            },
+        }, default=_msgpack_default)
+
+    @classmethod
+    def from_bytes(cls, data, osm_manager):
+        """
+        Deserialize the binary form written by to_bytes, like from_dict. Requires msgpack.
+        :param data: bytes returned by to_bytes.
+        :param osm_manager: An OSMManager instance for geographic and route data.
+        :return: A deserialized Person object (or its subclass).
+        """
+        msgpack = _import_msgpack()
+        state = msgpack.unpackb(data)
+        if state.get("version") != BINARY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported person format version {state.get('version')}.")
+
+        packed = state["movements"]
+        start_s = np.frombuffer(packed["start_s"], dtype=np.int32).tolist()
+        arrival_s = np.frombuffer(packed["arrival_s"], dtype=np.int32).tolist()
+        distance_m = np.frombuffer(packed["distance_m"], dtype=np.float64).tolist()
+        travel_time_s = np.frombuffer(packed["travel_time_s"], dtype=np.float64).tolist()
+        lengths = np.frombuffer(packed["route_lengths"], dtype=np.int64).tolist()
+        is_points = np.frombuffer(packed["route_is_points"], dtype=bool).tolist()
+        route_nodes = np.frombuffer(packed["route_nodes"], dtype=np.int64)
+        route_points = np.frombuffer(packed["route_points"], dtype=np.float64).reshape(-1, 2)
+        cumulative_m = np.frombuffer(packed["cumulative_m"], dtype=np.float32)
+
+        routes = osm_manager.route_table
+        detail_schedule = []
+        point, node, point_of_route = 0, 0, 0
+        for i, length in enumerate(lengths):
+            if is_points[i]:
+                nodes = route_points[point_of_route:point_of_route + length].tolist()
+                point_of_route += length
+            else:
+                nodes = route_nodes[node:node + length].tolist()
+                node += length
+            route_id = routes.add(nodes, cumulative_m[point:point + length])
+            point += length
+            detail_schedule.append(Movement(
+                packed["start_waypoint"][i], packed["end_waypoint"][i], start_s[i], arrival_s[i],
+                distance_m[i], travel_time_s[i], route_id, routes,
+            ))
+
+        return cls._restore(
+            osm_manager, state["unique_id"], state["type"], state["speed"], state["mode"], state["waypoints"],
+            schedule=[
+                {"start_waypoint": start, "end_waypoint": end, "start_time": seconds_to_time(seconds)}
+                for start, end, seconds in state["schedule"]
+            ],
+            detail_schedule=detail_schedule,
+        )
@@ -5,7 +5,8 @@ from geopy.geocoders import Nominatim
 from models.adult import Adult
 from models.child import Child
 from models.older import Older
-from osm_integration import OSMManager
+from models.waypoint_manager import PopulationWaypointAssigner
+from osm_integration import get_osm_manager
 
 
 class Survey:
@@ -28,11 +29,18 @@ class Survey:
         self.center_point = self._get_city_center()
 
         # Initialize OSMManager
-        self.osm_manager = OSMManager(self.center_point, radius, network_type="drive")
+        self.osm_manager = get_osm_manager(self.center_point, radius, network_type="drive", persist_route_cache=True)
 
         # Generate people for the survey
         self.people = self._generate_people()
 
+        # Route everyone's movements in one batch
+        self._build_trajectories()
+
+        # Keep the routes for the next survey on the same area
+        self.osm_manager.save_route_cache()
+        print(f"Route cache: {self.osm_manager.route_cache.stats()}")
+
     def _get_city_center(self):
         """
         Fetch the center point of the city using geocoding.
@@ -66,6 +74,11 @@ class Survey:
         num_adults = int(self.number_of_people * adult_ratio)
         num_older = self.number_of_people - num_children - num_adults 
 
+        # Assign everyone's waypoints in bulk
+        waypoints = PopulationWaypointAssigner().assign(
+            self.osm_manager, {"child": num_children, "adult": num_adults, "older": num_older}
+        )
+
         # Generate children
         for i in range(num_children):
             person = Child(
@@ -74,7 +87,8 @@ class Survey:
                 # speed=random.uniform(4.2, 5.5),  # Bus speed: ~15-20 km/h
                 speed=random.uniform(0.8, 1.4),  # Walking speed: ~3-5 km/h
                 osm_manager=self.osm_manager,
-                predefined_waypoints={}
+                predefined_waypoints=waypoints["child"][i],
+                defer_trajectories=True
             )
             people.append(person)
 
@@ -85,7 +99,8 @@ class Survey:
                 person_type="adult",
                 speed=random.uniform(11.1, 16.7),  # Car speed: ~40-60 km/h
                 osm_manager=self.osm_manager,
-                predefined_waypoints={}
+                predefined_waypoints=waypoints["adult"][i],
+                defer_trajectories=True
             )
             people.append(person)
 
@@ -96,11 +111,30 @@ class Survey:
                 person_type="older",
                 speed=random.uniform(0.8, 1.4),  # Walking speed: ~3-5 km/h
                 osm_manager=self.osm_manager,
-                predefined_waypoints={}
+                predefined_waypoints=waypoints["older"][i],
+                defer_trajectories=True
             )
             people.append(person)
 
         return people
+
+    def _build_trajectories(self):
+        """
+        Build the detailed schedules of all people with a single batched routing call.
+        """
+        pairs, speeds, counts = [], [], []
+        for person in self.people:
+            endpoints = person.movement_endpoints()
+            pairs.extend(endpoints)
+            speeds.extend([person.speed] * len(endpoints))
+            counts.append(len(endpoints))
+
+        trajectories = self.osm_manager.build_trajectories_batch(pairs, speeds)
+
+        offset = 0
+        for person, count in zip(self.people, counts):
+            person.apply_trajectories(trajectories[offset:offset + count])
+            offset += count
     
     # def simulate(self, records_per_person=100):
     #     """
@@ -141,6 +175,7 @@ class Survey:
         - survey_data: A list of dictionaries containing activity records.
         """
         survey_data = []
+        timestamps_by_person = {}
         current_date = self.start_date
 
         # Define activity periods (24-hour format)
@@ -177,20 +212,25 @@ class Survey:
                             seconds=random.randint(0, 59)
                         )
 
-                        # Determine the person's position at the timestamp
-                        position, log = person.get_position_at_time(random_time)
-
-                        # Record data
+                        # Record data; positions are filled in below, in one batch per person
                         survey_data.append({
                             "person_id": person.unique_id,
                             "timestamp": random_time.strftime("%Y-%m-%d %H:%M:%S"),
-                            "latitude": position[0],
-                            "longitude": position[1],
+                            "latitude": None,
+                            "longitude": None,
                         })
+                        timestamps_by_person.setdefault(person, []).append((random_time, len(survey_data) - 1))
 
             # Move to the next day
             current_date += timedelta(days=1)
 
+        # Determine the position of each person at all of their timestamps at once
+        for person, records in timestamps_by_person.items():
+            positions = person.get_positions_at_times([timestamp for timestamp, _ in records])
+            for (_, row), (latitude, longitude) in zip(records, positions.tolist()):
+                survey_data[row]["latitude"] = latitude
+                survey_data[row]["longitude"] = longitude
+
         return survey_data
     
     def save_to_csv(self, survey_data, file_path):
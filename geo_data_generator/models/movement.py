@@ -0,0 +1,135 @@
+from datetime import time
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def time_to_seconds(t):
+    """
+    :param t: datetime.time object.
+    :return: Whole seconds since midnight.
+    """
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def seconds_to_time(seconds):
+    """
+    :param seconds: Seconds since midnight (wrapped to one day).
+    :return: datetime.time object.
+    """
+    seconds = int(seconds) % SECONDS_PER_DAY
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+class Movement:
+    # Compact record: no per-instance dictionary, times as integer seconds and the route as an id
+    __slots__ = ("start_waypoint", "end_waypoint", "start_s", "arrival_s", "distance_m", "travel_time_s",
+                 "route_id", "routes")
+
+    def __init__(self, start_waypoint, end_waypoint, start_s, arrival_s, distance_m, travel_time_s, route_id, routes):
+        """
+        One movement of a detailed schedule.
+        :param start_waypoint: Name of the waypoint the movement starts from.
+        :param end_waypoint: Name of the waypoint the movement ends at.
+        :param start_s: Departure time, in whole seconds since midnight.
+        :param arrival_s: Arrival time, in whole seconds since midnight (smaller than start_s past midnight).
+        :param distance_m: Route length in meters.
+        :param travel_time_s: Travel time in seconds.
+        :param route_id: Id of the route in the route table.
+        :param routes: RouteTable holding the route (shared by the whole population).
+        """
+        self.start_waypoint = start_waypoint
+        self.end_waypoint = end_waypoint
+        self.start_s = start_s
+        self.arrival_s = arrival_s
+        self.distance_m = distance_m
+        self.travel_time_s = travel_time_s
+        self.route_id = route_id
+        self.routes = routes
+
+    @classmethod
+    def from_trajectory(cls, start_waypoint, end_waypoint, start_time, trajectory, routes):
+        """
+        Build a movement from a trajectory computed by OSMManager, interning its route.
+        :param start_waypoint: Name of the start waypoint.
+        :param end_waypoint: Name of the end waypoint.
+        :param start_time: Departure time (datetime.time).
+        :param trajectory: Dictionary with 'route_nodes', 'distance_m', 'travel_time_s' and optionally 'cumulative_m'.
+        :param routes: RouteTable to store the route in.
+        :return: Movement instance.
+        """
+        start_s = time_to_seconds(start_time)
+        route_id = routes.add(trajectory["route_nodes"], trajectory.get("cumulative_m"))
+        return cls(
+            start_waypoint, end_waypoint, start_s,
+            (start_s + int(trajectory["travel_time_s"])) % SECONDS_PER_DAY,
+            float(trajectory["distance_m"]), float(trajectory["travel_time_s"]), route_id, routes,
+        )
+
+    @classmethod
+    def from_dict(cls, data, routes):
+        """
+        Build a movement from its dictionary form (see to_dict), interning its route.
+        :param data: Dictionary with times as datetime.time objects or 'HH:MM:SS' strings.
+        :param routes: RouteTable to store the route in.
+        :return: Movement instance.
+        """
+        start_time, arrival_time = data["start_time"], data["arrival_time"]
+        if isinstance(start_time, str):
+            start_time = time.fromisoformat(start_time)
+        if isinstance(arrival_time, str):
+            arrival_time = time.fromisoformat(arrival_time)
+        return cls(
+            data["start_waypoint"], data["end_waypoint"], time_to_seconds(start_time), time_to_seconds(arrival_time),
+            float(data["distance_m"]), float(data["travel_time_s"]),
+            routes.add(data["route_nodes"], data.get("cumulative_m")), routes,
+        )
+
+    @property
+    def start_time(self):
+        """Departure time as a datetime.time."""
+        return seconds_to_time(self.start_s)
+
+    @property
+    def arrival_time(self):
+        """Arrival time as a datetime.time."""
+        return seconds_to_time(self.arrival_s)
+
+    @property
+    def route_nodes(self):
+        """List of the route's node IDs (or (latitude, longitude) points for straight-line routes)."""
+        return self.routes.nodes(self.route_id)
+
+    @property
+    def route_lats(self):
+        """Latitudes of the route points."""
+        return self.routes.coordinates(self.route_id)[0]
+
+    @property
+    def route_lons(self):
+        """Longitudes of the route points."""
+        return self.routes.coordinates(self.route_id)[1]
+
+    @property
+    def cumulative_m(self):
+        """Distance travelled at each route point, in meters."""
+        return self.routes.cumulative_m(self.route_id)
+
+    def __getitem__(self, key):
+        # Dictionary-style access, as when detailed schedules were lists of dictionaries
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_dict(self):
+        """Serialize the movement to a JSON-compatible dictionary."""
+        return {
+            "start_waypoint": self.start_waypoint,
+            "end_waypoint": self.end_waypoint,
+            "start_time": self.start_time.strftime("%H:%M:%S"),
+            "route_nodes": self.route_nodes,
+            "cumulative_m": self.cumulative_m.tolist(),
+            "distance_m": self.distance_m,
+            "travel_time_s": self.travel_time_s,
+            "arrival_time": self.arrival_time.strftime("%H:%M:%S"),
+        }
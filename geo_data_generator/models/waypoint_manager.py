@@ -1,6 +1,27 @@
 from abc import ABC, abstractmethod
 import random
-from shapely.geometry import Point, Polygon, MultiPolygon
+import numpy as np
+from shapely.geometry import Point
+
+# Waypoints of each person type: the location category, and optionally an earlier waypoint it must be nearest to
+WAYPOINT_CONFIGS = {
+    "child": {
+        "home": {"category": "residential"},
+        "school": {"category": "schools", "nearest_to": "home"},
+        "park": {"category": "parks"},
+    },
+    "adult": {
+        "home": {"category": "residential"},
+        "workplace": {"category": "workplaces"},
+        "gym": {"category": "gyms", "nearest_to": "home"},
+        "market": {"category": "markets", "nearest_to": "home"},
+    },
+    "older": {
+        "home": {"category": "residential"},
+        "healthcare": {"category": "healthcare", "nearest_to": "home"},
+        "park": {"category": "parks", "nearest_to": "home"},
+    },
+}
 
 class WaypointAssigner(ABC):
     @abstractmethod
@@ -30,26 +51,13 @@ class AutoWaypointAssigner(WaypointAssigner):
         return person.waypoints
 
     def _assign_child_waypoints(self, person):
-        return self._assign_multiple_locations(person, {
-            "home": {"category": "residential"},
-            "school": {"category": "schools", "nearest_to": "home"},
-            "park": {"category": "parks"},
-        })
+        return self._assign_multiple_locations(person, WAYPOINT_CONFIGS["child"])
 
     def _assign_adult_waypoints(self, person):
-        return self._assign_multiple_locations(person, {
-            "home": {"category": "residential"},
-            "workplace": {"category": "workplaces"},
-            "gym": {"category": "gyms", "nearest_to": "home"},
-            "market": {"category": "markets", "nearest_to": "home"},
-        })
+        return self._assign_multiple_locations(person, WAYPOINT_CONFIGS["adult"])
 
     def _assign_older_waypoints(self, person):
-        return self._assign_multiple_locations(person, {
-            "home": {"category": "residential"},
-            "healthcare": {"category": "healthcare", "nearest_to": "home"},
-            "park": {"category": "parks", "nearest_to": "home"},
-        })
+        return self._assign_multiple_locations(person, WAYPOINT_CONFIGS["older"])
 
     def _assign_multiple_locations(self, person, location_config):
         """
@@ -94,24 +102,19 @@ class AutoWaypointAssigner(WaypointAssigner):
             return self._random_point_in_bbox(person)
 
         if nearest_to_point:
-            reference_point = Point(nearest_to_point[1], nearest_to_point[0])
-            nearest_geom = min(
-                areas.geometry,
-                key=lambda geom: reference_point.distance(geom.centroid)
-            )
-            return (nearest_geom.centroid.y, nearest_geom.centroid.x)
-        else:
-            polygon = self._choose_random_polygon(areas)
-            return self._random_point_in_polygon(polygon) if polygon else self._random_point_in_bbox(person)
-        
+            centroids, _ = person.osm_manager.nearest(category, [nearest_to_point])
+            return tuple(centroids[0].tolist())
+
+        sampler = person.osm_manager.poi_index[category].sampler
+        if not len(sampler):
+            return self._random_point_in_bbox(person)
+        return tuple(sampler.sample(1)[0].tolist())
+
     def _random_point_in_bbox(self, person):
         """
         Assign a random point within the bounding box of the graph.
         """
-        bounds = person.osm_manager.graph.graph.get("bbox")
-        if not bounds:
-            raise ValueError(f"No bounding box available for Person {person.unique_id}.")
-        min_x, min_y, max_x, max_y = bounds
+        min_x, min_y, max_x, max_y = person.osm_manager.bbox
 
         random_point = Point(
             random.uniform(min_x, max_x),
@@ -119,33 +122,84 @@ class AutoWaypointAssigner(WaypointAssigner):
         )
         return (random_point.y, random_point.x)
 
-    def _choose_random_polygon(self, geodataframe):
+class PopulationWaypointAssigner:
+    def __init__(self, rng=None):
         """
-        Safely choose a random Polygon or MultiPolygon from a GeoDataFrame.
+        Assign the waypoints of a whole population at once: random locations of each category are
+        sampled in one call, and every 'nearest_to' lookup of a category is one batched spatial query.
+        :param rng: Optional numpy random Generator.
         """
-        polygons = [
-            geom for geom in geodataframe.geometry
-            if isinstance(geom, (Polygon, MultiPolygon))
-        ]
-        return random.choice(polygons) if polygons else None
+        self.rng = rng if rng is not None else np.random.default_rng()
 
-    def _random_point_in_polygon(self, polygon, max_attempts=1000):
+    def assign(self, osm_manager, counts):
         """
-        Generate a random point within a given Polygon or MultiPolygon.
+        :param osm_manager: OSMManager holding the scanned locations.
+        :param counts: Dictionary {person_type: number of people}.
+        :return: Dictionary {person_type: list of waypoint dictionaries}, one per person,
+                 to be passed to the Person constructors as predefined waypoints.
         """
-        min_x, min_y, max_x, max_y = polygon.bounds
+        for person_type in counts:
+            if person_type not in WAYPOINT_CONFIGS:
+                raise ValueError(f"Unknown person type: {person_type}")
+
+        # Waypoint coordinates as (n, 2) arrays: {person_type: {waypoint: points}}
+        points = {person_type: {} for person_type in counts}
+
+        # Random locations first, grouped by category (e.g. every home in one draw)
+        random_waypoints, nearest_waypoints = {}, {}
+        for person_type, n in counts.items():
+            for waypoint, config in WAYPOINT_CONFIGS[person_type].items():
+                groups = nearest_waypoints if config.get("nearest_to") else random_waypoints
+                groups.setdefault(config["category"], []).append((person_type, waypoint))
+
+        # Scan every category needed that is not loaded yet in a single query
+        osm_manager.poi_index.load(list(random_waypoints) + list(nearest_waypoints))
+
+        for category, members in random_waypoints.items():
+            sampled = self._sample(osm_manager, category, sum(counts[person_type] for person_type, _ in members))
+            self._split(sampled, members, counts, points)
+
+        # Then one nearest-location query per category over all reference points
+        for category, members in nearest_waypoints.items():
+            references = []
+            for person_type, waypoint in members:
+                nearest_to = WAYPOINT_CONFIGS[person_type][waypoint]["nearest_to"]
+                if nearest_to not in points[person_type]:
+                    raise ValueError(f"Waypoint '{nearest_to}' must be a random waypoint to assign '{waypoint}'.")
+                references.append(points[person_type][nearest_to])
+            references = np.concatenate(references)
+            try:
+                nearest, _ = osm_manager.nearest(category, references)
+            except ValueError:
+                print(f"No {category} areas found. Falling back to bounding box.")
+                nearest = self._random_points_in_bbox(osm_manager, len(references))
+            self._split(nearest, members, counts, points)
+
+        return {
+            person_type: [
+                {waypoint: tuple(points[person_type][waypoint][i].tolist()) for waypoint in WAYPOINT_CONFIGS[person_type]}
+                for i in range(n)
+            ]
+            for person_type, n in counts.items()
+        }
+
+    def _sample(self, osm_manager, category, n):
+        index = osm_manager.poi_index.get(category)
+        if index is None or not len(index.sampler):
+            print(f"No {category} areas found. Falling back to bounding box.")
+            return self._random_points_in_bbox(osm_manager, n)
+        return index.sampler.sample(n, rng=self.rng)
+
+    def _split(self, coords, members, counts, points):
+        start = 0
+        for person_type, waypoint in members:
+            points[person_type][waypoint] = coords[start:start + counts[person_type]]
+            start += counts[person_type]
 
-        for _ in range(max_attempts):
-            random_point = Point(
-                random.uniform(min_x, max_x),
-                random.uniform(min_y, max_y)
-            )
-            if polygon.contains(random_point):
-                return (random_point.y, random_point.x)
+    def _random_points_in_bbox(self, osm_manager, n):
+        min_x, min_y, max_x, max_y = osm_manager.bbox
+        return np.column_stack((self.rng.uniform(min_y, max_y, n), self.rng.uniform(min_x, max_x, n)))
 
-        print(f"Warning: Unable to find a random point in polygon after {max_attempts} attempts.")
-        return None
-    
 class ManualWaypointAssigner(WaypointAssigner):
 
     ### Without UI ###
@@ -0,0 +1,218 @@
+import bz2
+import gzip
+import os
+import re
+import tempfile
+import xml.etree.ElementTree as ET
+import osmnx as ox
+from poi_scan import features_from_elements, write_osm_xml
+
+try:
+    # osmnx has no public API for the way filter of a network type: this helper is private to the
+    # osmnx version pinned in requirements.txt
+    from osmnx._overpass import _get_network_filter
+except ImportError:
+    _get_network_filter = None
+
+# Clauses of an osmnx Overpass way filter: ["key"], ["key"~"regex"] or ["key"!~"regex"]
+FILTER_CLAUSE = re.compile(r'\["([^"]+)"(?:(!?~)"([^"]*)")?\]')
+
+
+def iter_osm_elements(path):
+    """
+    Stream the elements of an OSM extract as Overpass-style dictionaries, without loading the file.
+    Supports OSM XML (.osm, optionally .gz/.bz2 compressed) and PBF (.pbf, requires pyosmium).
+    :param path: Path of the extract.
+    :return: Generator of element dictionaries (type, id, lat/lon or nodes or members, tags).
+    """
+    if path.endswith(".pbf"):
+        return _iter_pbf_elements(path)
+    return _iter_xml_elements(path)
+
+
+def _iter_xml_elements(path):
+    opener = gzip.open if path.endswith(".gz") else bz2.open if path.endswith(".bz2") else open
+    with opener(path, "rb") as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or elem.tag not in ("node", "way", "relation"):
+                continue
+            element = {"type": elem.tag, "id": int(elem.get("id"))}
+            tags = {tag.get("k"): tag.get("v") for tag in elem.iter("tag")}
+            if tags:
+                element["tags"] = tags
+            if elem.tag == "node":
+                element["lat"], element["lon"] = float(elem.get("lat")), float(elem.get("lon"))
+            elif elem.tag == "way":
+                element["nodes"] = [int(nd.get("ref")) for nd in elem.iter("nd")]
+            else:
+                element["members"] = [
+                    {"type": member.get("type"), "ref": int(member.get("ref")), "role": member.get("role", "")}
+                    for member in elem.iter("member")
+                ]
+            # Free the parsed element (and the root's reference to it) to keep memory flat
+            root.clear()
+            yield element
+
+
+def _iter_pbf_elements(path):
+    try:
+        import osmium
+    except ImportError:
+        raise ImportError("Reading .pbf extracts requires pyosmium: pip install osmium") from None
+
+    member_types = {"n": "node", "w": "way", "r": "relation"}
+    for obj in osmium.FileProcessor(path):
+        element = {"id": obj.id}
+        tags = {tag.k: tag.v for tag in obj.tags}
+        if tags:
+            element["tags"] = tags
+        if obj.is_node():
+            if not obj.location.valid():
+                continue
+            element.update(type="node", lat=obj.location.lat, lon=obj.location.lon)
+        elif obj.is_way():
+            element.update(type="way", nodes=[node.ref for node in obj.nodes])
+        elif obj.is_relation():
+            element.update(type="relation", members=[
+                {"type": member_types[member.type], "ref": member.ref, "role": member.role} for member in obj.members
+            ])
+        else:
+            continue
+        yield element
+
+
+def matches_way_filter(tags, way_filter):
+    """
+    Evaluate an osmnx Overpass way filter (e.g. from the 'drive' network type) on a way's tags.
+    :param tags: Dictionary of the way's tags.
+    :param way_filter: Filter string made of ["key"], ["key"~"regex"] and ["key"!~"regex"] clauses.
+    :return: True if the way passes every clause.
+    """
+    for key, operator, pattern in FILTER_CLAUSE.findall(way_filter):
+        value = tags.get(key)
+        if not operator:
+            if value is None:
+                return False
+        elif operator == "~":
+            if value is None or not re.search(pattern, value):
+                return False
+        elif value is not None and re.search(pattern, value):
+            return False
+    return True
+
+
+class OSMExtract:
+    def __init__(self, path, center_point, dist, feature_keys=()):
+        """
+        Read the part of a local OSM extract around a point, in one streaming pass.
+        Only nodes inside the bounding box are kept, with the ways and relations that use them,
+        so memory depends on the requested area and not on the size of the extract.
+        :param path: Path of the extract (.osm, .osm.gz, .osm.bz2 or .osm.pbf).
+        :param center_point: (latitude, longitude) of the center.
+        :param dist: Distance in meters from the center to each side of the bounding box.
+        :param feature_keys: Tag keys of the features to keep (e.g. 'amenity', 'leisure').
+        """
+        self.path = path
+        self.center_point = center_point
+        self.dist = dist
+        self.bbox = ox.utils_geo.bbox_from_point(center_point, dist)
+        self.feature_keys = set(feature_keys)
+
+        self.nodes = {}
+        self.highways = []
+        self.areas = {}
+        self.relations = []
+        self._read()
+
+    def _read(self):
+        west, south, east, north = self.bbox
+        print(f"Reading OSM extract {self.path} around {self.center_point} within {self.dist} meters...")
+        for element in iter_osm_elements(self.path):
+            tags = element.get("tags", {})
+            if element["type"] == "node":
+                if south <= element["lat"] <= north and west <= element["lon"] <= east:
+                    self.nodes[element["id"]] = element
+            elif element["type"] == "way":
+                inside = [node in self.nodes for node in element["nodes"]]
+                if not any(inside):
+                    continue
+                if "highway" in tags:
+                    self.highways.append(element)
+                # Areas and (untagged) relation members are only kept whole
+                if all(inside) and (not tags or self.feature_keys.intersection(tags)):
+                    self.areas[element["id"]] = element
+            elif element["type"] == "relation":
+                if self.feature_keys.intersection(tags) and any(
+                    member["type"] == "way" and member["ref"] in self.areas for member in element["members"]
+                ):
+                    self.relations.append(element)
+
+        # Untagged ways were only kept as possible relation members
+        members = {member["ref"] for relation in self.relations for member in relation["members"]}
+        self.areas = {
+            way_id: way for way_id, way in self.areas.items() if way.get("tags") or way_id in members
+        }
+        print(f"Read {len(self.nodes)} nodes, {len(self.highways)} highways and "
+              f"{len(self.areas) + len(self.relations)} areas from the extract.")
+
+    def graph(self, network_type="drive", simplify=True, retain_all=False):
+        """
+        Build the street network like ox.graph_from_point would, with ox.graph_from_xml.
+        Ways crossing the bounding box are cut into their runs of nodes inside it.
+        :param network_type: osmnx network type ('drive', 'walk', 'bike', 'all', ...).
+        :param simplify: Whether to simplify the graph topology.
+        :param retain_all: Whether to keep every component, not only the largest weakly connected one.
+        :return: networkx MultiDiGraph.
+        """
+        if _get_network_filter is None:
+            raise ImportError(
+                f"Building a graph from an OSM extract requires the osmnx version pinned in requirements.txt "
+                f"(osmnx {ox.__version__} is installed)."
+            )
+        way_filter = _get_network_filter(network_type)
+        ways = []
+        # osmnx keys ways by ID: the other runs of a way get temporary (negative) IDs, mapped back below
+        way_ids = {}
+        for way in self.highways:
+            if not matches_way_filter(way.get("tags", {}), way_filter):
+                continue
+            run, run_id = [], way["id"]
+            for node in way["nodes"] + [None]:
+                if node in self.nodes:
+                    run.append(node)
+                    continue
+                if len(run) >= 2:
+                    way_ids[run_id] = way["id"]
+                    ways.append({**way, "id": run_id, "nodes": run})
+                    run_id = -len(way_ids) - 1
+                run = []
+        if not ways:
+            raise ValueError(f"No '{network_type}' streets found in {self.path} around {self.center_point}.")
+
+        used = {node for way in ways for node in way["nodes"]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.osm")
+            write_osm_xml([self.nodes[node] for node in used] + ways, path)
+            G = ox.graph_from_xml(
+                path, bidirectional=network_type in ox.settings.bidirectional_network_types,
+                simplify=False, retain_all=True,
+            )
+        for _, _, data in G.edges(data=True):
+            data["osmid"] = way_ids[data["osmid"]]
+
+        if not retain_all:
+            G = ox.truncate.largest_component(G, strongly=False)
+        if simplify:
+            G = ox.simplify_graph(G)
+        return G
+
+    def features(self, tags):
+        """
+        Build features like ox.features_from_point would.
+        :param tags: Dictionary of OSM tags to select.
+        :return: GeoDataFrame of matching features within the bounding box.
+        """
+        elements = list(self.nodes.values()) + list(self.areas.values()) + self.relations
+        return features_from_elements(elements, ox.utils_geo.bbox_to_poly(self.bbox), tags)
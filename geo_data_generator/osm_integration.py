@@ -2,20 +2,138 @@ import osmnx as ox
 import networkx as nx
 from geopy.distance import geodesic
 import geopandas as gpd
+import pandas as pd
+import numpy as np
 import os
+import sys
 import pickle
 import hashlib
+import gc
+import inspect
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from cache_io import atomic_write
+from routing import CSRGraph, ROUTING_STRATEGIES
+from graph_store import graph_digest, has_graph_arrays, load_graph_arrays, save_graph_arrays, crop_graph_arrays
+from region_index import RegionIndex, bbox_from_point
+from spatial_index import NodeIndex
+from route_cache import RouteCache
+from route_table import RouteTable
+from contraction import ContractionHierarchy
+from osm_extract import OSMExtract
+from poi_index import POIIndex
+from poi_scan import POI_CATEGORIES, LocationStore, LocationFrames, merge_tags, select_category, features_from_cache
+
+ROUTING_BACKENDS = ("csr", "networkx")
+
+# Managers built by get_osm_manager, keyed by their constructor arguments (least recently used first)
+MAX_SHARED_MANAGERS = 4
+_managers = OrderedDict()
+_managers_lock = threading.Lock()
+
+# One lock per graph cache entry being loaded or built, so a graph is downloaded or built once per process,
+# with the number of managers holding or waiting for it
+_build_locks = {}
+
+@contextmanager
+def _build_lock(cache_dir, cache_key):
+    """
+    Hold the lock of a graph cache entry while the graph (or a cache derived from it) is loaded or built.
+    The lock is forgotten once no manager holds or waits for it.
+    :param cache_dir: Absolute graph cache directory.
+    :param cache_key: Cache key of a graph.
+    """
+    key = (cache_dir, cache_key)
+    with _managers_lock:
+        entry = _build_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _managers_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _build_locks[key]
+
+
+def _graph_nbytes(graph):
+    """
+    Estimate the memory held by a networkx graph: its adjacency dictionaries and its node and edge attributes
+    (the attribute values themselves are counted shallowly, e.g. not the coordinates of edge geometries).
+    :param graph: networkx graph.
+    :return: Estimated size in bytes.
+    """
+    adjacency = [neighbours for _, neighbours in graph.adjacency()]
+    size = sum(sys.getsizeof(neighbours) for neighbours in adjacency)
+    if graph.is_multigraph():
+        size += sum(sys.getsizeof(keys) for neighbours in adjacency for keys in neighbours.values())
+    if graph.is_directed():
+        # The predecessor dictionaries mirror the successor ones
+        size *= 2
+    for data in [data for _, data in graph.nodes(data=True)] + [data for *_, data in graph.edges(data=True)]:
+        size += sys.getsizeof(data) + sum(sys.getsizeof(value) for value in data.values())
+    return size
+
+
 class OSMManager:
-    def __init__(self, center_point, radius=10000, network_type="drive", cache_dir="graph_cache"):
+    def __init__(self, center_point, radius=10000, network_type="drive", cache_dir="graph_cache", routing_backend="csr",
+                 route_cache_size=100000, persist_route_cache=False, contraction_hierarchy=False,
+                 routing_strategy="dijkstra", offline_pois=False, poi_workers=4,
+                 osm_extract=None, low_memory=False, max_resnap_m=500):
         """
         Initialize the OSMManager with a graph for a specified center point and radius.
         :param center_point: (latitude, longitude) of the center point.
         :param radius: Radius in meters for the area of interest.
         :param network_type: Type of network to load (default: 'drive').
+        :param routing_backend: Shortest-path backend, 'csr' (array-based Dijkstra) or 'networkx' (reference).
+        :param route_cache_size: Maximum number of routes kept in the in-memory LRU cache.
+        :param persist_route_cache: Whether to load/save the route cache next to the cached graph.
+        :param contraction_hierarchy: Whether to preprocess the graph into a contraction hierarchy
+                                      (cached next to the graph) for fast point-to-point queries.
+                                      Preprocessing takes seconds to tens of seconds per 10k nodes
+                                      (see the README). Requires the 'csr' backend.
+        :param routing_strategy: Point-to-point search of the 'csr' backend: 'dijkstra', 'astar'
+                                 (great-circle heuristic) or 'bidirectional'.
+        :param offline_pois: Whether to build locations only from the Overpass responses already in
+                             the osmnx cache (cache/*.json), with no network access.
+        :param poi_workers: Number of threads splitting the scanned features into categories.
+        :param osm_extract: Path of a local OSM extract (.osm, .osm.gz, .osm.bz2 or .osm.pbf) to build the
+                            graph and locations from instead of the Overpass API.
+        :param low_memory: Whether to keep only what the simulation uses (routing arrays, node coordinates,
+                           POI centroids and samplers) and release the networkx graph and feature geometries.
+                           Requires the 'csr' backend.
+        :param max_resnap_m: Maximum distance in meters between a point and the node it is re-snapped to
+                             when its nearest node is not connected to the other end of the trip; beyond it,
+                             the trip follows a straight line.
         """
-        self.center_point = center_point
+        if routing_backend not in ROUTING_BACKENDS:
+            raise ValueError(f"Invalid routing backend '{routing_backend}'. Must be one of {ROUTING_BACKENDS}.")
+        if contraction_hierarchy and routing_backend != "csr":
+            raise ValueError("Contraction hierarchies require the 'csr' routing backend.")
+        if low_memory and routing_backend != "csr":
+            raise ValueError("Low-memory mode requires the 'csr' routing backend.")
+        if routing_strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Invalid routing strategy '{routing_strategy}'. Must be one of {ROUTING_STRATEGIES}.")
+        if routing_strategy != "dijkstra" and routing_backend != "csr":
+            raise ValueError(f"Routing strategy '{routing_strategy}' requires the 'csr' routing backend.")
+
+        self.center_point = tuple(center_point)
         self.radius = radius
         self.network_type = network_type
+        self.routing_backend = routing_backend
+        self.route_cache_size = route_cache_size
+        self.persist_route_cache = persist_route_cache
+        self.contraction_hierarchy = contraction_hierarchy
+        self.routing_strategy = routing_strategy
+        self.offline_pois = offline_pois
+        self.poi_workers = poi_workers
+        self.osm_extract = osm_extract
+        self._extract = None
+        self.low_memory = low_memory
+        self.max_resnap_m = max_resnap_m
 
         self.cache_dir = cache_dir
 
@@ -23,58 +141,273 @@ class OSMManager:
         os.makedirs(self.cache_dir, exist_ok=True)
 
         # Initialize attributes to store data
-        self.graph = None
-        self.nodes = None
-        self.edges = None
-        self.locations = {
-            "schools": None,
-            "workplaces": None,
-            "parks": None,
-            "markets": None,
-            "healthcare": None,
-            "play_areas": None,
-            "gyms": None,
-            "residential": None
-        }
+        self.cache_key = None
+        self.graph_digest = None
+        self.crs = None
+        self._graph = None
+        self._graph_path = None
+        self._graph_nodes = None
+        self._edges = None
+        self.csr_graph = None
+        self.router = None
+        self.hierarchy = None
+        self.route_cache = None
+        self.route_table = None
+        self.node_index = None
+        self._nodes = None
+
+        # Location categories are scanned on first access (see warm_locations to preload them)
+        self.poi_index = LocationStore(self._scan_categories)
+        self.locations = LocationFrames(self.poi_index)
 
         # Load the graph
         self.load_graph()
 
-
-        # Scan all locations
-        self.scan_all_locations()
+        if self.low_memory:
+            self.compact()
 
     def _generate_cache_key(self):
         """
-        Generate a unique cache key for the current center point and radius.
+        Generate a unique cache key for the current center point and radius (and local extract, if any).
         :return: A unique hash string.
         """
         key_data = f"{self.center_point}-{self.radius}-{self.network_type}"
+        source = self._data_source()
+        if source is not None:
+            key_data += f"-{source}"
         return hashlib.md5(key_data.encode()).hexdigest()
+
+    def _data_source(self):
+        """
+        Identify the data a graph is built from, so that cached graphs are only reused for the same data.
+        :return: None for the Overpass API, or the path, modification time and size of the local extract.
+        """
+        if not self.osm_extract:
+            return None
+        stat = os.stat(self.osm_extract)
+        return f"{os.path.abspath(self.osm_extract)}:{stat.st_mtime_ns}:{stat.st_size}"
     
     def load_graph(self):
         """
         Load the graph for the specified center point and radius.
-        Reuse cached graph if available.
+        Reuse cached graph if available: the compact array cache (graph_cache/<key>/) is
+        memory-mapped, and the pickled networkx graph is only read if something needs it.
+        If this exact region was never cached but lies inside a cached (larger) region,
+        the cached graph is cropped in memory instead of downloading again.
         """
         cache_key = self._generate_cache_key()
-        cache_path = os.path.join(self.cache_dir, f"{cache_key}.pkl")
+        self.cache_key = cache_key
+        self._graph_path = os.path.join(self.cache_dir, f"{cache_key}.pkl")
+        # Other managers of this process wait here instead of building the same graph (or its derived caches)
+        with _build_lock(os.path.abspath(self.cache_dir), cache_key):
+            components = self._load_or_build_graph(cache_key)
+        # Derived caches are named after the graph's contents: a request cropped from a larger cached
+        # region must not reuse those built for a different graph under the same request key
+        self.graph_digest = graph_digest(self.csr_graph)
+
+        # Spatial index for snapping points to nodes, with strongly connected component labels
+        # so unreachable pairs are known before any search
+        self.node_index = NodeIndex(self.csr_graph.node_ids, self.csr_graph.lats, self.csr_graph.lons)
+        self.node_index.set_components(components)
+        # One node ID -> position mapping for the whole manager (routing, snapping and the route table)
+        self.csr_graph.node_index = self.node_index.position
+
+        # The array-based routing backend works directly on the CSR arrays
+        if self.routing_backend == "csr":
+            self.router = self.csr_graph
+
+        # Optional contraction hierarchy, cached alongside the graph
+        if self.contraction_hierarchy:
+            ch_path = os.path.join(self.cache_dir, f"{self.graph_digest}.ch.npz")
+            with _build_lock(os.path.abspath(self.cache_dir), cache_key):
+                self.hierarchy = ContractionHierarchy.load_or_build(self.router, ch_path)
+
+        # Routes between snapped nodes, shared by everyone routed on this graph
+        route_cache_path = (
+            os.path.join(self.cache_dir, f"{self.graph_digest}.routes.pkl") if self.persist_route_cache else None
+        )
+        self.route_cache = RouteCache(self.graph_digest, maxsize=self.route_cache_size, cache_path=route_cache_path)
+
+        # Routes followed by simulated people, each stored once for the whole population
+        self.route_table = RouteTable(self.node_index.position, self.csr_graph.node_ids, self.csr_graph.lats, self.csr_graph.lons)
+
+    def _load_or_build_graph(self, cache_key):
+        """
+        Load the graph arrays from the cache, crop them from a cached covering region, or download
+        and cache the graph.
+        :param cache_key: Cache key of the requested graph.
+        :return: Strongly connected component label of every node.
+        """
+        region_index = RegionIndex(self.cache_dir)
 
-        if os.path.exists(cache_path):
-            print(f"Loading graph from cache: {cache_path}")
-            with open(cache_path, "rb") as f:
-                self.graph = pickle.load(f)
+        if has_graph_arrays(os.path.join(self.cache_dir, cache_key)) or os.path.exists(self._graph_path):
+            self.csr_graph, components = self._load_cached_arrays(cache_key)
         else:
-            print(f"Generating graph for center point {self.center_point} with radius {self.radius} meters...")
-            self.graph = ox.graph_from_point(
-                self.center_point, dist=self.radius, network_type=self.network_type, simplify=True
+            covering_key = region_index.find_covering(
+                self.center_point, self.radius, self.network_type, source=self._data_source()
+            )
+            if covering_key is not None:
+                print(f"Cropping cached graph {covering_key} to center point {self.center_point} "
+                      f"with radius {self.radius} meters...")
+                self.csr_graph, components = self._crop_cached_region(covering_key)
+            else:
+                print(f"Generating graph for center point {self.center_point} with radius {self.radius} meters...")
+                if self.osm_extract:
+                    self._graph = self.extract.graph(self.network_type, simplify=True)
+                else:
+                    self._graph = ox.graph_from_point(
+                        self.center_point, dist=self.radius, network_type=self.network_type, simplify=True
+                    )
+                with atomic_write(self._graph_path) as f:
+                    pickle.dump(self._graph, f)
+                print(f"Graph saved to cache: {self._graph_path}")
+                self.csr_graph, components = self._load_cached_arrays(cache_key)
+
+        # Only graphs covering their full requested region can serve later, smaller requests
+        if self._graph_nodes is None:
+            region_index.add(cache_key, self.center_point, self.radius, self.network_type, source=self._data_source())
+        return components
+
+    def _load_cached_arrays(self, cache_key):
+        """
+        Load the compact arrays of a cached graph, building them from the pickled graph
+        (and adding them to the cache) the first time.
+        :param cache_key: Cache key of the graph.
+        :return: Tuple (csr_graph, components).
+        """
+        arrays_dir = os.path.join(self.cache_dir, cache_key)
+        if has_graph_arrays(arrays_dir):
+            print(f"Loading compact graph from cache: {arrays_dir}")
+            csr_graph, components, meta = load_graph_arrays(arrays_dir)
+            self.crs = meta["crs"]
+            return csr_graph, components
+
+        graph = self._graph
+        if graph is None:
+            graph_path = os.path.join(self.cache_dir, f"{cache_key}.pkl")
+            print(f"Loading graph from cache: {graph_path}")
+            with open(graph_path, "rb") as f:
+                graph = pickle.load(f)
+            if cache_key == self.cache_key:
+                self._graph = graph
+
+        # Build the arrays once and keep them in the compact cache
+        self.crs = graph.graph.get("crs")
+        csr_graph = CSRGraph.from_networkx(graph, weight="length")
+        components = csr_graph.strong_components()
+        save_graph_arrays(arrays_dir, csr_graph, components, crs=self.crs)
+        print(f"Compact graph saved to cache: {arrays_dir}")
+        return csr_graph, components
+
+    def _crop_cached_region(self, covering_key):
+        """
+        Crop a cached graph covering a larger region to the requested bounding box.
+        Components are recomputed, since cropping can disconnect parts of the network.
+        :param covering_key: Cache key of the covering graph.
+        :return: Tuple (csr_graph, components) of the cropped graph.
+        """
+        csr_graph, _ = self._load_cached_arrays(covering_key)
+        south, west, north, east = bbox_from_point(self.center_point, self.radius)
+        lats, lons = np.asarray(csr_graph.lats), np.asarray(csr_graph.lons)
+        keep = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        csr_graph = crop_graph_arrays(csr_graph, keep)
+
+        # The networkx graph, if ever needed, is the matching subgraph of the covering one
+        self._graph_path = os.path.join(self.cache_dir, f"{covering_key}.pkl")
+        self._graph_nodes = csr_graph.node_ids.tolist()
+        return csr_graph, csr_graph.strong_components()
+
+    def compact(self):
+        """
+        Release everything the simulation does not need: the networkx graph, the edges and nodes
+        DataFrames, the extract contents and the geometries of loaded location
+        categories (their centroids and samplers are kept). Categories loaded later are compacted as
+        they are scanned. Routing keeps only the graph arrays (memory-mapped when loaded from the
+        compact cache) and one node ID -> position mapping.
+        Anything released is rebuilt (the networkx graph reloaded from the cache) if something asks for it.
+        :return: Dictionary of the estimated bytes released: 'graph_bytes' (networkx graph), 'frames_bytes'
+                 (edges and nodes DataFrames) and 'location_bytes' (coordinates of location geometries).
+                 A value is None when nothing of that kind was loaded.
+        """
+        self.low_memory = True
+        frames = [frame for frame in (self._edges, self._nodes) if frame is not None]
+        loaded_categories = [category for category in self.poi_index if self.poi_index.is_loaded(category)]
+        report = {
+            "graph_bytes": _graph_nbytes(self._graph) if self._graph is not None else None,
+            "frames_bytes": sum(int(frame.memory_usage(deep=True).sum()) for frame in frames) if frames else None,
+            "location_bytes": 0 if loaded_categories else None,
+        }
+
+        self._graph = None
+        self._edges = None
+        self._nodes = None
+        self._extract = None
+        for category in loaded_categories:
+            report["location_bytes"] += self.poi_index[category].compact()
+        self.locations.clear()
+        gc.collect()
+
+        released = [
+            f"{label}: {report[key] / 2**20:.1f} MB" if report[key] is not None else f"{label}: not loaded"
+            for label, key in (("networkx graph", "graph_bytes"), ("DataFrames", "frames_bytes"),
+                               ("location geometries", "location_bytes"))
+        ]
+        print(f"Compact mode released (estimated) {', '.join(released)}.")
+        return report
+
+    @property
+    def bbox(self):
+        """
+        Bounding box of the graph nodes as (min_x, min_y, max_x, max_y), i.e. (west, south, east, north).
+        """
+        lons, lats = np.asarray(self.csr_graph.lons), np.asarray(self.csr_graph.lats)
+        return float(lons.min()), float(lats.min()), float(lons.max()), float(lats.max())
+
+    @property
+    def extract(self):
+        """
+        The area of the local OSM extract around the center point, read on first access.
+        """
+        if self._extract is None and self.osm_extract:
+            self._extract = OSMExtract(
+                self.osm_extract, self.center_point, self.radius, feature_keys=merge_tags(POI_CATEGORIES).keys()
             )
-            with open(cache_path, "wb") as f:
-                pickle.dump(self.graph, f)
-            print(f"Graph saved to cache: {cache_path}")
+        return self._extract
 
-        # Convert the graph to GeoDataFrames
-        self.nodes, self.edges = ox.graph_to_gdfs(self.graph)
+    @property
+    def graph(self):
+        """
+        The networkx graph, unpickled from the cache on first access
+        (restricted to the cropped nodes if the graph was cropped from a larger cached region).
+        """
+        if self._graph is None and self._graph_path and os.path.exists(self._graph_path):
+            print(f"Loading graph from cache: {self._graph_path}")
+            with open(self._graph_path, "rb") as f:
+                self._graph = pickle.load(f)
+            if self._graph_nodes is not None:
+                self._graph = self._graph.subgraph(self._graph_nodes).copy()
+        return self._graph
+
+    @property
+    def nodes(self):
+        """
+        DataFrame of node coordinates ('y', 'x') indexed by node ID, built from the graph arrays on first access.
+        """
+        if self._nodes is None:
+            self._nodes = pd.DataFrame(
+                {"y": self.csr_graph.lats, "x": self.csr_graph.lons},
+                index=pd.Index(self.csr_graph.node_ids, name="osmid"),
+            )
+        return self._nodes
+
+    @property
+    def edges(self):
+        """
+        GeoDataFrame of graph edges, built from the networkx graph on first access.
+        """
+        if self._edges is None and self.graph is not None:
+            self._edges = ox.graph_to_gdfs(self.graph, nodes=False)
+        return self._edges
 
     def get_nearest_node(self, point):
         """
@@ -82,7 +415,65 @@ class OSMManager:
         :param point: (latitude, longitude)
         :return: Node ID
         """
-        return ox.nearest_nodes(self.graph, X=point[1], Y=point[0])
+        return self.get_nearest_nodes([point])[0]
+
+    def get_nearest_nodes(self, points):
+        """
+        Find the nearest node to each of several points in one vectorized query.
+        :param points: Sequence or (N, 2) array of (latitude, longitude).
+        :return: List of node IDs, one per point.
+        """
+        node_ids, _ = self.node_index.query(points)
+        return node_ids
+
+    def snap_pair(self, depart, arrival):
+        """
+        Snap a departure and an arrival point to nodes in the same strongly connected component.
+        :param depart: Tuple (latitude, longitude) of the departure point.
+        :param arrival: Tuple (latitude, longitude) of the arrival point.
+        :return: Tuple (depart_node, arrival_node), or None if no connected nodes are close enough.
+        """
+        (depart_node, arrival_node), (depart_m, arrival_m) = self.node_index.query([depart, arrival])
+        return self._reconcile_components(depart, arrival, depart_node, arrival_node, depart_m, arrival_m)
+
+    def _reconcile_components(self, depart, arrival, depart_node, arrival_node, depart_m, arrival_m):
+        """
+        Re-snap endpoints whose nearest nodes are not mutually reachable.
+        Picks, by total snapping distance, the cheapest of: moving the arrival into the departure's
+        component, moving the departure into the arrival's component, or moving both into the
+        largest component. A point is never moved to a node more than max_resnap_m away.
+        :param depart: Tuple (latitude, longitude) of the departure point.
+        :param arrival: Tuple (latitude, longitude) of the arrival point.
+        :param depart_node: Nearest node to the departure point.
+        :param arrival_node: Nearest node to the arrival point.
+        :param depart_m: Snapping distance of the departure point in meters.
+        :param arrival_m: Snapping distance of the arrival point in meters.
+        :return: Tuple (depart_node, arrival_node), or None if no connected nodes are close enough.
+        """
+        depart_component = self.node_index.component_of(depart_node)
+        arrival_component = self.node_index.component_of(arrival_node)
+        if depart_component == arrival_component:
+            return depart_node, arrival_node
+
+        options = []
+        node, distance_m = self.node_index.query_in_component(arrival, depart_component)
+        if distance_m <= self.max_resnap_m:
+            options.append((depart_m + distance_m, depart_node, node))
+        node, distance_m = self.node_index.query_in_component(depart, arrival_component)
+        if distance_m <= self.max_resnap_m:
+            options.append((distance_m + arrival_m, node, arrival_node))
+        largest = self.node_index.largest_component
+        largest_depart, largest_depart_m = self.node_index.query_in_component(depart, largest)
+        largest_arrival, largest_arrival_m = self.node_index.query_in_component(arrival, largest)
+        if max(largest_depart_m, largest_arrival_m) <= self.max_resnap_m:
+            options.append((largest_depart_m + largest_arrival_m, largest_depart, largest_arrival))
+
+        if not options:
+            print(f"No connected nodes within {self.max_resnap_m} m of {depart} and {arrival}")
+            return None
+        _, depart_node, arrival_node = min(options, key=lambda option: option[0])
+        print(f"Re-snapped {depart} → {arrival} to connected nodes {depart_node} → {arrival_node}")
+        return depart_node, arrival_node
 
     def shortest_path(self, origin_point, destination_point, weight="length"):
         """
@@ -91,22 +482,62 @@ class OSMManager:
         :param destination_point: (latitude, longitude) of the destination.
         :param weight: Edge weight to optimize (default: 'length').
         :return: List of node IDs representing the shortest path.
+        :raises nx.NetworkXNoPath: If no connected nodes are close enough to both points.
         Dijkstra’s Algorithm
         """
-        origin_node = self.get_nearest_node(origin_point)
-        destination_node = self.get_nearest_node(destination_point)
-        route = nx.shortest_path(self.graph, origin_node, destination_node, weight=weight)
+        node_pair = self.snap_pair(origin_point, destination_point)
+        if node_pair is None:
+            raise nx.NetworkXNoPath(f"No connected nodes near {origin_point} and {destination_point}.")
+        origin_node, destination_node = node_pair
+        route, _ = self.find_route(origin_node, destination_node, weight=weight)
         return route
 
-    def route_distance(self, route):
+    def find_route(self, origin_node, destination_node, weight="length"):
         """
-        Calculate the total distance of a route.
-        :param route: List of node IDs representing a path.
-        :return: Total distance in meters.
+        Compute the shortest path between two graph nodes with the configured backend.
+        :param origin_node: Node ID of the origin.
+        :param destination_node: Node ID of the destination.
+        :param weight: Edge weight to optimize (default: 'length').
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the route length up to route_nodes[i].
+        :raises nx.NetworkXNoPath: If the destination is unreachable.
         """
-        return sum(nx.get_edge_attributes(self.graph, "length")[(route[i], route[i + 1], 0)]
-                   for i in range(len(route) - 1))
-    
+        cached = self.route_cache.get(origin_node, destination_node, weight)
+        if cached is not None:
+            return cached
+        if self.hierarchy is not None and weight == self.router.weight:
+            route = self.hierarchy.shortest_path(origin_node, destination_node)
+        elif self.router is not None and weight == self.router.weight:
+            route = self.router.shortest_path(origin_node, destination_node, strategy=self.routing_strategy)
+        else:
+            route = self.find_route_between([origin_node], [destination_node], weight=weight)
+        self.route_cache.put(origin_node, destination_node, route, weight)
+        return route
+
+    def save_route_cache(self):
+        """Persist the route cache next to the cached graph (requires persist_route_cache=True)."""
+        self.route_cache.save()
+
+    def find_route_between(self, origin_nodes, destination_nodes, weight="length"):
+        """
+        Compute the shortest path from any of the origin nodes to the closest reachable destination node.
+        Runs a single multi-source search instead of one search per (origin, destination) pair.
+        :param origin_nodes: List of candidate origin node IDs.
+        :param destination_nodes: List of candidate destination node IDs.
+        :param weight: Edge weight to optimize (default: 'length').
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the route length up to route_nodes[i].
+        :raises nx.NetworkXNoPath: If no destination is reachable from any origin.
+        """
+        if self.router is not None and weight == self.router.weight:
+            return self.router.shortest_path_between(origin_nodes, destination_nodes)
+
+        # Reference networkx backend
+        lengths, paths = nx.multi_source_dijkstra(self.graph, set(origin_nodes), weight=weight)
+        reachable = [node for node in destination_nodes if node in lengths]
+        if not reachable:
+            raise nx.NetworkXNoPath(f"No path between {origin_nodes} and {destination_nodes}.")
+        route = paths[min(reachable, key=lengths.get)]
+        return route, [lengths[node] for node in route]
+
     def straight_line_distance(self, point1, point2):
             """
             Calculate the straight-line distance between two points.
@@ -121,15 +552,19 @@ class OSMManager:
         General method to scan locations for a given category using tags.
         :param category: The category of the location (e.g., 'parks', 'schools').
         :param tags: Dictionary of OSM tags for filtering locations.
-        :return: GeoDataFrame containing the scanned locations.
+        :return: Geometry-only GeoDataFrame containing the scanned locations.
         """
         print(f"Scanning for {category} near {self.center_point} within {self.radius} meters...")
         try:
-            locations = ox.features_from_point(self.center_point, dist=self.radius, tags=tags)
+            features = self._query_features(tags)
         except Exception as e:
             print(f"Error scanning {category}: {e}")
-            locations = gpd.GeoDataFrame()
-        self.locations[category] = locations
+            features = gpd.GeoDataFrame()
+        index = POIIndex.from_features(features)
+        if self.low_memory:
+            index.compact()
+        self.poi_index.set(category, index)
+        locations = self.locations[category]
         if not locations.empty:
             print(f"Found {len(locations)} {category}.")
         else:
@@ -167,22 +602,83 @@ class OSMManager:
     # def scan_gyms(self):
     #     return self.scan_locations("gyms", {"leisure": "fitness_centre"})
 
-    def scan_all_locations(self):
-        """Scan and store locations for all predefined categories."""
-        categories = {
-            "residential": {"landuse": "residential"},
-            "parks": {"leisure": "park"},
-            "schools": {"amenity": "school"},
-            "workplaces": {"office": True, "landuse": "industrial"},
-            "markets": {"shop": "supermarket"},
-            "healthcare": {"amenity": ["hospital", "clinic", "pharmacy"]},
-            "play_areas": {"leisure": "playground"},
-            "gyms": {"leisure": "fitness_centre"}
-        }
-        for category, tags in categories.items():
-            print(f"Scanning for {category}...")
-            self.locations[category] = self.scan_locations(category, tags)
+    def _query_features(self, tags):
+        """
+        Query OSM features matching tags around the center point, from the local extract, from Overpass
+        or offline from the cache.
+        :param tags: Dictionary of OSM tags.
+        :return: GeoDataFrame of features.
+        """
+        if self.osm_extract:
+            return self.extract.features(tags)
+        if self.offline_pois:
+            return features_from_cache(self.center_point, self.radius, tags)
+        return ox.features_from_point(self.center_point, dist=self.radius, tags=tags)
 
+    def scan_all_locations(self, categories=None):
+        """
+        Scan (or rescan) and store locations for the predefined categories.
+        :param categories: Categories to scan (default: all).
+        """
+        categories = list(categories) if categories is not None else list(POI_CATEGORIES)
+        for category, index in self._scan_categories(categories).items():
+            self.poi_index.set(category, index)
+
+    def warm_locations(self, categories=None):
+        """
+        Scan categories that are not loaded yet in the background; accessing them waits for this scan.
+        :param categories: Categories to preload (default: all).
+        :return: Future completed when the categories are loaded.
+        """
+        return self.poi_index.warm(categories)
+
+    def _scan_categories(self, categories):
+        """
+        Scan several categories at once.
+        A single merged tag query is made, and its result is split into categories in a thread pool,
+        each category being kept as a compact POIIndex (the full-tag features are not kept).
+        :param categories: List of categories from POI_CATEGORIES.
+        :return: Dictionary {category: POIIndex}.
+        """
+        category_tags = {category: POI_CATEGORIES[category] for category in categories}
+        print(f"Scanning for {', '.join(category_tags)} near {self.center_point} within {self.radius} meters...")
+        try:
+            features = self._query_features(merge_tags(category_tags))
+        except Exception as e:
+            print(f"Error scanning locations: {e}")
+            features = gpd.GeoDataFrame()
+
+        indexes = {}
+        with ThreadPoolExecutor(max_workers=self.poi_workers) as executor:
+            futures = {
+                category: executor.submit(lambda tags: POIIndex.from_features(select_category(features, tags)), tags)
+                for category, tags in category_tags.items()
+            }
+            for category, future in futures.items():
+                indexes[category] = future.result()
+                if self.low_memory:
+                    indexes[category].compact()
+                if len(indexes[category]):
+                    print(f"Found {len(indexes[category])} {category}.")
+                else:
+                    print(f"No {category} found in the specified area.")
+        return indexes
+
+    def nearest(self, category, points, k=1):
+        """
+        Find the locations of a category nearest to many reference points in one call.
+        :param category: Location category (e.g., 'schools').
+        :param points: Sequence or (N, 2) array of (latitude, longitude).
+        :param k: Number of locations per point.
+        :return: Tuple (centroids, distances_m): (latitude, longitude) centroids of shape (N, 2)
+                 (or (N, k, 2) if k > 1) and great-circle distances in meters.
+        :raises ValueError: If no locations of this category were found.
+        """
+        index = self.poi_index.get(category)
+        if index is None or not len(index):
+            raise ValueError(f"No {category} locations available.")
+        positions, distances_m = index.nearest(points, k=k)
+        return index.centroids[positions], distances_m
 
     def build_trajectory(self, depart, arrival, speed_m_s=1.4):
         """
@@ -193,35 +689,16 @@ class OSMManager:
         :return: Dictionary containing trajectory details.
         """
         try:
-            # Get the nearest nodes for departure and arrival points
-            depart_node = self.get_nearest_node(depart)
-            arrival_node = self.get_nearest_node(arrival)
+            # Get mutually reachable nodes for departure and arrival points
+            node_pair = self.snap_pair(depart, arrival)
+            if node_pair is None:
+                return self._straight_line_fallback(depart, arrival, speed_m_s)
+            depart_node, arrival_node = node_pair
             print(f"Depart Node: {depart_node}, Arrival_node: {arrival_node}")
 
-            # Try finding the shortest path directly
-            try:
-                route_nodes = nx.shortest_path(self.graph, depart_node, arrival_node, weight="length")
-            except nx.NetworkXNoPath:
-                # Handle the case where no direct path exists
-                route_nodes, depart_node, arrival_node = self._handle_no_path(depart, arrival, depart_node, arrival_node)
-                if not route_nodes:
-                    return self._straight_line_fallback(depart_node , arrival_node, speed_m_s)
-
-            # Calculate the total distance of the route
-            distance_m = self.route_distance(route_nodes)
-
-            # Calculate travel time in seconds
-            travel_time_s = distance_m / speed_m_s
-
-            # Build the detailed trajectory information
-            trajectory_details = {
-                "start_waypoint": depart,
-                "end_waypoint": arrival,
-                "route_nodes": route_nodes,
-                "distance_m": distance_m,
-                "travel_time_s": travel_time_s,
-            }
+            route_nodes, cumulative_m = self.find_route(depart_node, arrival_node)
 
+            trajectory_details = self._trajectory_details(depart, arrival, route_nodes, cumulative_m, speed_m_s)
             print(f"Trajectory built from {depart} to {arrival} with {len(route_nodes)} nodes.")
             return trajectory_details
 
@@ -230,32 +707,94 @@ class OSMManager:
             # Fallback to straight line in case of any unexpected error
             return self._straight_line_fallback(depart, arrival, speed_m_s)
 
-    def _handle_no_path(self, depart, arrival, depart_node, arrival_node):
-        """
-        Handle cases where no direct path exists between two nodes by expanding search space.
-        :param depart: Departure coordinates (latitude, longitude).
-        :param arrival: Arrival coordinates (latitude, longitude).
-        :param depart_node: Closest graph node to the departure point.
-        :param arrival_node: Closest graph node to the arrival point.
-        :return: Tuple (route_nodes, updated_depart_node, updated_arrival_node).
-        """
-        nearby_depart_nodes = self.get_nearby_nodes(depart_node)
-        nearby_arrival_nodes = self.get_nearby_nodes(arrival_node)
-        print(f"Nearby_depart_node: {nearby_depart_nodes}, Nearby_arrival_nodes: {nearby_arrival_nodes}")
-
-        # Try finding a path using nearby nodes
-        for d_node in nearby_depart_nodes:
-            for a_node in nearby_arrival_nodes:
-                try:
-                    route_nodes = nx.shortest_path(self.graph, d_node, a_node, weight="length")
-                    print(f"Path found between nearby nodes: {d_node} → {a_node}")
-                    return route_nodes, d_node, a_node
-                except nx.NetworkXNoPath:
-                    continue
-
-        # If no path found, return None
-        print(f"No path found between nearby nodes for {depart} to {arrival}.")
-        return None, None, None
+    def build_trajectories_batch(self, pairs, speeds):
+        """
+        Build trajectories for many (departure, arrival) pairs at once.
+        All endpoints are snapped in one query, requests are grouped by origin node and
+        one shortest-path tree is grown per distinct origin.
+        :param pairs: List of tuples (depart, arrival), each a (latitude, longitude) tuple.
+        :param speeds: List of average speeds in meters/second, one per pair.
+        :return: List of trajectory dictionaries (as returned by build_trajectory), in input order.
+        """
+        if not pairs:
+            return []
+
+        # Snap every endpoint at once, then fix the pairs that are not mutually reachable
+        snapped, snapped_m = self.node_index.query([point for pair in pairs for point in pair])
+        node_pairs = [
+            self._reconcile_components(depart, arrival, snapped[2 * i], snapped[2 * i + 1], snapped_m[2 * i], snapped_m[2 * i + 1])
+            for i, (depart, arrival) in enumerate(pairs)
+        ]
+
+        # Group the requests that are not cached yet by origin node
+        routes = {}
+        targets_by_origin = {}
+        for node_pair in set(node_pairs) - {None}:
+            origin_node, destination_node = node_pair
+            cached = self.route_cache.get(origin_node, destination_node)
+            if cached is not None:
+                routes[(origin_node, destination_node)] = cached
+            else:
+                targets_by_origin.setdefault(origin_node, set()).add(destination_node)
+
+        # One single-source search per distinct origin
+        for origin_node, destination_nodes in targets_by_origin.items():
+            if self.router is not None:
+                tree = self.router.shortest_path_tree(origin_node, destination_nodes)
+            else:
+                lengths, paths = nx.single_source_dijkstra(self.graph, origin_node, weight="length")
+                tree = {
+                    node: (paths[node], [lengths[n] for n in paths[node]])
+                    for node in destination_nodes if node in paths
+                }
+            for destination_node, route in tree.items():
+                self.route_cache.put(origin_node, destination_node, route)
+                routes[(origin_node, destination_node)] = route
+
+        trajectories = []
+        for (depart, arrival), node_pair, speed_m_s in zip(pairs, node_pairs, speeds):
+            if node_pair in routes:
+                route_nodes, cumulative_m = routes[node_pair]
+                trajectories.append(self._trajectory_details(depart, arrival, route_nodes, cumulative_m, speed_m_s))
+            else:
+                # No connected nodes close enough to these endpoints
+                trajectories.append(self._straight_line_fallback(depart, arrival, speed_m_s))
+
+        print(f"Built {len(trajectories)} trajectories with {len(targets_by_origin)} shortest-path searches.")
+        return trajectories
+
+    def _trajectory_details(self, depart, arrival, route_nodes, cumulative_m, speed_m_s):
+        """
+        Build the trajectory dictionary for a computed route.
+        :param depart: Tuple (latitude, longitude) of the departure point.
+        :param arrival: Tuple (latitude, longitude) of the arrival point.
+        :param route_nodes: List of node IDs of the route.
+        :param cumulative_m: Cumulative route length at each node, in meters.
+        :param speed_m_s: Average speed in meters/second.
+        :return: Dictionary containing trajectory details.
+        """
+        # The total distance of the route comes with the routing result
+        distance_m = cumulative_m[-1]
+
+        # Calculate travel time in seconds
+        travel_time_s = distance_m / speed_m_s
+
+        return {
+            "start_waypoint": depart,
+            "end_waypoint": arrival,
+            "route_nodes": route_nodes,
+            "cumulative_m": cumulative_m,
+            "distance_m": distance_m,
+            "travel_time_s": travel_time_s,
+        }
+
+    def _node_coordinates(self, node):
+        """
+        :param node: Node ID.
+        :return: (latitude, longitude) of the node.
+        """
+        position = self.node_index.position[node]
+        return float(self.csr_graph.lats[position]), float(self.csr_graph.lons[position])
 
     def _straight_line_fallback(self, start, end, speed_m_s):
         """
@@ -267,12 +806,12 @@ class OSMManager:
         """
         # Resolve node IDs to coordinates if necessary
         if isinstance(start, (int, str)):  # Node ID
-            start_coords = (self.osm_manager.nodes.loc[start, "y"], self.osm_manager.nodes.loc[start, "x"])
+            start_coords = self._node_coordinates(start)
         else:
             start_coords = start  # Already a coordinate
 
         if isinstance(end, (int, str)):  # Node ID
-            end_coords = (self.osm_manager.nodes.loc[end, "y"], self.osm_manager.nodes.loc[end, "x"])
+            end_coords = self._node_coordinates(end)
         else:
             end_coords = end  # Already a coordinate
 
@@ -284,22 +823,48 @@ class OSMManager:
             "start_waypoint": start_coords,
             "end_waypoint": end_coords,
             "route_nodes": [start_coords, end_coords],  # Represent as just the points
+            "cumulative_m": [0.0, distance_m],
             "distance_m": distance_m,
             "travel_time_s": travel_time_s,
         }
-    
 
-    def get_nearby_nodes(self, node, radius=50):
-        """
-        Get nearby nodes to the given node within a specified radius.
-        :param node: The node ID to find nearby nodes for.
-        :param radius: The search radius in meters.
-        :return: List of nearby node IDs.
-        """
-        x, y = self.graph.nodes[node]["x"], self.graph.nodes[node]["y"]
-        nearby_nodes = [
-            n for n, attrs in self.graph.nodes(data=True)
-            if self.straight_line_distance((y, x), (attrs["y"], attrs["x"])) <= radius
-        ]
-        return nearby_nodes
 
+def get_osm_manager(center_point, radius=10000, **kwargs):
+    """
+    Return a shared OSMManager for these arguments, building it only once per process.
+    Concurrent callers asking for the same manager (e.g. several Dash callbacks) wait for the first
+    build. Managers with different options over the same graph (e.g. a Survey and the Dash app)
+    are distinct, but their graph is still downloaded and cached only once (see load_graph).
+    Only the MAX_SHARED_MANAGERS most recently requested managers are kept; a failed (or interrupted)
+    build is not kept: its waiting callers get its error, and a later call retries it.
+    :param center_point: (latitude, longitude) of the center point.
+    :param radius: Radius in meters for the area of interest.
+    :param kwargs: Other OSMManager arguments (network_type, cache_dir, routing_backend, ...).
+    :return: OSMManager instance.
+    """
+    # Arguments left to their default and passed explicitly give the same key
+    arguments = inspect.signature(OSMManager).bind(center_point, radius, **kwargs)
+    arguments.apply_defaults()
+    arguments.arguments["center_point"] = tuple(center_point)
+    arguments.arguments["cache_dir"] = os.path.abspath(arguments.arguments["cache_dir"])
+    key = tuple(arguments.arguments.items())
+
+    with _managers_lock:
+        future = _managers.get(key)
+        owner = future is None
+        if owner:
+            future = _managers[key] = Future()
+        _managers.move_to_end(key)
+        # Forget the least recently requested managers (their users keep their own references)
+        for old_key in list(_managers)[:-MAX_SHARED_MANAGERS]:
+            if _managers[old_key].done():
+                del _managers[old_key]
+    if owner:
+        try:
+            future.set_result(OSMManager(center_point, radius, **kwargs))
+        except BaseException as e:
+            with _managers_lock:
+                _managers.pop(key, None)
+            future.set_exception(e)
+            raise
+    return future.result()
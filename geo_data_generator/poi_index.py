@@ -0,0 +1,153 @@
+from functools import cached_property
+import numpy as np
+import shapely
+import geopandas as gpd
+from scipy.spatial import cKDTree
+from spatial_index import EARTH_RADIUS_M, to_unit_sphere
+
+# Square meters per square degree at the equator
+M2_PER_DEG2 = (np.pi * EARTH_RADIUS_M / 180) ** 2
+
+
+class POIIndex:
+    def __init__(self, geometry, crs="epsg:4326"):
+        """
+        Compact store of the locations of one category: geometries, centroids and areas,
+        with a KD-tree over the centroids for nearest-location queries.
+        :param geometry: Array-like of shapely geometries in (lon, lat) coordinates.
+        :param crs: CRS of the geometries.
+        """
+        self.geometry = np.asarray(geometry, dtype=object)
+        self.crs = crs
+
+        centroids = shapely.centroid(self.geometry)
+        self.lons = shapely.get_x(centroids)
+        self.lats = shapely.get_y(centroids)
+
+        # Approximate area in square meters (degrees scaled at the centroid latitude)
+        self.areas = shapely.area(self.geometry) * M2_PER_DEG2 * np.cos(np.radians(self.lats))
+
+        self.tree = cKDTree(to_unit_sphere(self.lats, self.lons)) if len(self.geometry) else None
+
+    @classmethod
+    def from_features(cls, features):
+        """
+        Build the index from a features GeoDataFrame, keeping only the geometries.
+        :param features: GeoDataFrame returned by a features query (may be empty).
+        :return: POIIndex instance.
+        """
+        if features.empty:
+            return cls([])
+        return cls(features.geometry.to_numpy(), crs=features.crs)
+
+    def __len__(self):
+        return len(self.lats)
+
+    @property
+    def centroids(self):
+        """(N, 2) array of (latitude, longitude) centroids."""
+        return np.column_stack((self.lats, self.lons))
+
+    def to_geodataframe(self):
+        """
+        :return: Geometry-only GeoDataFrame of the locations (their centroids once compacted).
+        """
+        if not len(self):
+            return gpd.GeoDataFrame()
+        geometry = self.geometry if self.geometry is not None else shapely.points(self.lons, self.lats)
+        return gpd.GeoDataFrame(geometry=geometry, crs=self.crs)
+
+    def compact(self):
+        """
+        Build the sampler, then release the geometries: only centroids, areas, the KD-tree
+        and the sampler's triangles are kept.
+        :return: Estimated bytes released: the coordinates of the geometries, 16 bytes per (x, y) pair
+                 (0 if already compact).
+        """
+        if self.geometry is None:
+            return 0
+        # Triangulate while the geometries are still available
+        self.sampler
+        released = int(shapely.get_num_coordinates(self.geometry).sum()) * 16
+        self.geometry = None
+        return released
+
+    @cached_property
+    def sampler(self):
+        """Area-weighted sampler over the polygons of this category, built on first use."""
+        return PolygonSampler(self.geometry)
+
+    def nearest(self, points, k=1):
+        """
+        Find the locations whose centroids are nearest (great-circle) to many points at once.
+        :param points: Sequence or (N, 2) array of (latitude, longitude).
+        :param k: Number of neighbours per point.
+        :return: Tuple (positions, distances_m), each of shape (N,) if k == 1 else (N, k).
+        :raises ValueError: If the index is empty.
+        """
+        if self.tree is None:
+            raise ValueError("No locations to search.")
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        chord, positions = self.tree.query(to_unit_sphere(points[:, 0], points[:, 1]), k=min(k, len(self)))
+        distances_m = 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / 2, 0, 1))
+        return positions, distances_m
+
+
+class PolygonSampler:
+    def __init__(self, geometry):
+        """
+        Uniform random points over a set of polygons: the polygons are triangulated once,
+        and triangles are drawn with probability proportional to their area.
+        Geometries without area (points, lines) are ignored.
+        :param geometry: Array-like of shapely geometries in (lon, lat) coordinates.
+        """
+        geometry = np.asarray(geometry, dtype=object)
+        polygons = shapely.get_parts(geometry[shapely.area(geometry) > 0]) if len(geometry) else np.empty(0, dtype=object)
+        polygons = polygons[shapely.get_type_id(polygons) == 3] if len(polygons) else polygons
+
+        if hasattr(shapely, "constrained_delaunay_triangles"):
+            triangles = shapely.get_parts(shapely.constrained_delaunay_triangles(polygons))
+        else:
+            # Shapely < 2.1: unconstrained triangulation of each polygon's vertices, which covers its
+            # convex hull. Clip every triangle to its polygon: no vertex lies inside a triangle, so the
+            # pieces are convex and the triangulation of their own vertices covers exactly the polygon.
+            triangles, owners = shapely.get_parts(shapely.delaunay_triangles(polygons), return_index=True)
+            pieces = shapely.get_parts(shapely.intersection(triangles, polygons[owners]))
+            pieces = pieces[(shapely.get_type_id(pieces) == 3) & (shapely.area(pieces) > 0)]
+            triangles = shapely.get_parts(shapely.delaunay_triangles(pieces))
+
+        # Triangle vertices as (N, 3, 2) arrays of (lon, lat); each ring has 4 coordinates (closed)
+        corners = shapely.get_coordinates(triangles).reshape(-1, 4, 2)[:, :3] if len(triangles) else np.empty((0, 3, 2))
+        self.a = corners[:, 0]
+        self.ab = corners[:, 1] - self.a
+        self.ac = corners[:, 2] - self.a
+
+        # Area in degrees, scaled at each triangle's latitude so weights are proportional to square meters
+        cross = np.abs(self.ab[:, 0] * self.ac[:, 1] - self.ab[:, 1] * self.ac[:, 0]) / 2
+        weights = cross * np.cos(np.radians(corners[:, :, 1].mean(axis=1)))
+        self.cumulative_weights = np.cumsum(weights)
+
+    def __len__(self):
+        return len(self.a)
+
+    def sample(self, n, rng=None):
+        """
+        Draw uniformly distributed points over the polygons.
+        :param n: Number of points.
+        :param rng: Optional numpy random Generator.
+        :return: (n, 2) array of (latitude, longitude).
+        :raises ValueError: If there is no polygon to sample from.
+        """
+        if not len(self):
+            raise ValueError("No polygons to sample from.")
+        rng = rng if rng is not None else np.random.default_rng()
+        triangles = np.searchsorted(
+            self.cumulative_weights, rng.random(n) * self.cumulative_weights[-1], side="right"
+        ).clip(max=len(self) - 1)
+
+        # Uniform point in a triangle: fold points of the parallelogram back into the triangle
+        r = rng.random((n, 2))
+        outside = r.sum(axis=1) > 1
+        r[outside] = 1 - r[outside]
+        points = self.a[triangles] + r[:, :1] * self.ab[triangles] + r[:, 1:] * self.ac[triangles]
+        return points[:, ::-1]
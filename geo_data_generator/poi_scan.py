@@ -0,0 +1,245 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from xml.sax.saxutils import XMLGenerator
+import geopandas as gpd
+import pandas as pd
+import osmnx as ox
+
+# OSM tags of every location category scanned around the center point
+POI_CATEGORIES = {
+    "residential": {"landuse": "residential"},
+    "parks": {"leisure": "park"},
+    "schools": {"amenity": "school"},
+    "workplaces": {"office": True, "landuse": "industrial"},
+    "markets": {"shop": "supermarket"},
+    "healthcare": {"amenity": ["hospital", "clinic", "pharmacy"]},
+    "play_areas": {"leisure": "playground"},
+    "gyms": {"leisure": "fitness_centre"}
+}
+
+
+def merge_tags(categories):
+    """
+    Merge the tags of several categories into a single Overpass tag query.
+    :param categories: Dictionary {category: tags} as in POI_CATEGORIES.
+    :return: Dictionary {key: True or list of values} matching the union of all categories.
+    """
+    merged = {}
+    for tags in categories.values():
+        for key, value in tags.items():
+            if value is True or merged.get(key) is True:
+                merged[key] = True
+                continue
+            values = merged.setdefault(key, [])
+            for v in [value] if isinstance(value, str) else value:
+                if v not in values:
+                    values.append(v)
+    return merged
+
+
+def select_category(features, tags):
+    """
+    Select the features matching a category's tags (union of the tags, as in ox.features_from_point).
+    :param features: GeoDataFrame returned by a merged tag query.
+    :param tags: Dictionary of OSM tags of the category.
+    :return: GeoDataFrame with the matching features.
+    """
+    if features.empty:
+        return gpd.GeoDataFrame()
+    mask = pd.Series(False, index=features.index)
+    for key, value in tags.items():
+        if key not in features.columns:
+            continue
+        if value is True:
+            mask |= features[key].notna()
+        else:
+            mask |= features[key].isin([value] if isinstance(value, str) else value)
+    return features[mask]
+
+
+def write_osm_xml(elements, path):
+    """
+    Write Overpass-style element dictionaries as an OSM XML file.
+    :param elements: Iterable of element dictionaries (type, id, lat/lon or nodes or members, tags).
+    :param path: Destination path.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        xml = XMLGenerator(f, encoding="utf-8")
+        xml.startDocument()
+        xml.startElement("osm", {"version": "0.6"})
+        for element in elements:
+            attrs = {"id": str(element["id"])}
+            if element["type"] == "node":
+                attrs.update(lat=str(element["lat"]), lon=str(element["lon"]))
+            xml.startElement(element["type"], attrs)
+            for node in element.get("nodes", ()):
+                xml.startElement("nd", {"ref": str(node)})
+                xml.endElement("nd")
+            for member in element.get("members", ()):
+                xml.startElement("member", {"type": member["type"], "ref": str(member["ref"]), "role": member["role"]})
+                xml.endElement("member")
+            for key, value in element.get("tags", {}).items():
+                xml.startElement("tag", {"k": key, "v": value})
+                xml.endElement("tag")
+            xml.endElement(element["type"])
+        xml.endElement("osm")
+        xml.endDocument()
+
+
+def features_from_elements(elements, polygon, tags):
+    """
+    Build features from Overpass-style element dictionaries with osmnx's public OSM XML reader.
+    :param elements: Iterable of element dictionaries.
+    :param polygon: Shapely polygon the features must intersect.
+    :param tags: Dictionary of OSM tags to select.
+    :return: GeoDataFrame of matching features.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "elements.osm")
+        write_osm_xml(elements, path)
+        return ox.features_from_xml(path, polygon=polygon, tags=tags)
+
+
+def features_from_cache(center_point, dist, tags, cache_folder=None):
+    """
+    Build features around a point from the Overpass responses already stored in the osmnx cache,
+    without any network access.
+    :param center_point: (latitude, longitude) of the center.
+    :param dist: Distance in meters from the center to each side of the bounding box.
+    :param tags: Dictionary of OSM tags to select.
+    :param cache_folder: osmnx cache folder (default: ox.settings.cache_folder).
+    :return: GeoDataFrame of the cached features matching the tags within the bounding box.
+    """
+    cache_folder = cache_folder or ox.settings.cache_folder
+    elements = {}
+    for path in sorted(glob.glob(os.path.join(cache_folder, "*.json"))):
+        with open(path) as f:
+            response = json.load(f)
+        # Only Overpass responses carry elements (geocoder results are lists)
+        if isinstance(response, dict):
+            for element in response.get("elements", []):
+                elements[(element["type"], element["id"])] = element
+    if not elements:
+        return gpd.GeoDataFrame()
+
+    polygon = ox.utils_geo.bbox_to_poly(ox.utils_geo.bbox_from_point(center_point, dist))
+    return features_from_elements(elements.values(), polygon, tags)
+
+
+class LocationStore(Mapping):
+    def __init__(self, loader, categories=POI_CATEGORIES):
+        """
+        Per-category POIIndex mapping whose categories are scanned on first access.
+        Each category is loaded once: concurrent accesses (or a background warm-up) share the same scan.
+        :param loader: Callable taking a list of categories and returning {category: POIIndex}.
+        :param categories: Known categories.
+        """
+        self._loader = loader
+        self._categories = list(categories)
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, category):
+        if category not in self._categories:
+            raise KeyError(category)
+        self.load([category])
+        return self._futures[category].result()
+
+    def __iter__(self):
+        return iter(self._categories)
+
+    def __len__(self):
+        return len(self._categories)
+
+    def is_loaded(self, category):
+        """
+        :param category: Location category.
+        :return: True if the category has been scanned.
+        """
+        future = self._futures.get(category)
+        return future is not None and future.done()
+
+    def set(self, category, index):
+        """
+        Store the index of a category directly (e.g. after scanning it with custom tags).
+        :param category: Location category.
+        :param index: POIIndex of the category.
+        """
+        future = Future()
+        future.set_result(index)
+        with self._lock:
+            if category not in self._categories:
+                self._categories.append(category)
+            self._futures[category] = future
+
+    def load(self, categories):
+        """
+        Scan the categories that are not loaded or loading yet in one loader call, then wait for all of them.
+        :param categories: Iterable of categories.
+        """
+        categories = list(categories)
+        owned = []
+        with self._lock:
+            for category in categories:
+                if category not in self._futures:
+                    self._futures[category] = Future()
+                    owned.append(category)
+        if owned:
+            try:
+                indexes = self._loader(owned)
+                for category in owned:
+                    self._futures[category].set_result(indexes[category])
+            except Exception as e:
+                for category in owned:
+                    self._futures[category].set_exception(e)
+                raise
+        for category in categories:
+            self._futures[category].result()
+
+    def warm(self, categories=None, executor=None):
+        """
+        Load categories in the background.
+        :param categories: Categories to load (default: all).
+        :param executor: Executor to run the scan on (default: a new single thread).
+        :return: Future completed when the categories are loaded.
+        """
+        categories = list(categories) if categories is not None else list(self._categories)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1)
+            future = executor.submit(self.load, categories)
+            executor.shutdown(wait=False)
+            return future
+        return executor.submit(self.load, categories)
+
+
+class LocationFrames(Mapping):
+    def __init__(self, store):
+        """
+        Read-only view of a LocationStore as geometry-only GeoDataFrames, loaded on first access.
+        :param store: LocationStore to read from.
+        """
+        self._store = store
+        self._frames = {}
+
+    def __getitem__(self, category):
+        index = self._store[category]
+        frame = self._frames.get(category)
+        if frame is None or frame[0] is not index:
+            frame = (index, index.to_geodataframe())
+            self._frames[category] = frame
+        return frame[1]
+
+    def __iter__(self):
+        return iter(self._store)
+
+    def __len__(self):
+        return len(self._store)
+
+    def clear(self):
+        """Drop the cached GeoDataFrames (they are rebuilt from the store on next access)."""
+        self._frames = {}
@@ -0,0 +1,84 @@
+import json
+import math
+import os
+from cache_io import atomic_write
+from spatial_index import EARTH_RADIUS_M
+
+
+def bbox_from_point(center_point, dist):
+    """
+    Bounding box extending `dist` meters north/south/east/west of a point (as used by ox.graph_from_point).
+    :param center_point: (latitude, longitude) of the center.
+    :param dist: Distance in meters from the center to each side of the box.
+    :return: Tuple (south, west, north, east) in degrees.
+    """
+    lat, lon = center_point
+    delta_lat = math.degrees(dist / EARTH_RADIUS_M)
+    delta_lon = delta_lat / math.cos(math.radians(lat))
+    return lat - delta_lat, lon - delta_lon, lat + delta_lat, lon + delta_lon
+
+
+class RegionIndex:
+    def __init__(self, cache_dir, filename="regions.json"):
+        """
+        Index of the regions covered by cached graphs, stored as bounding boxes next to the cache.
+        Lets a request inside an already cached area be served without any download.
+        :param cache_dir: Graph cache directory.
+        :param filename: Name of the index file inside the cache directory.
+        """
+        self.path = os.path.join(cache_dir, filename)
+        self.regions = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.regions = json.load(f)
+
+    def add(self, cache_key, center_point, radius, network_type, source=None):
+        """
+        Record the region of a cached graph and save the index.
+        :param cache_key: Cache key of the graph.
+        :param center_point: (latitude, longitude) the graph was downloaded around.
+        :param radius: Download distance in meters.
+        :param network_type: Network type of the graph.
+        :param source: Data the graph was built from (None for the Overpass API, else its local extract).
+        """
+        if cache_key in self.regions:
+            return
+        self.regions[cache_key] = {
+            "center_point": list(center_point),
+            "radius": radius,
+            "network_type": network_type,
+            "source": source,
+            "bbox": list(bbox_from_point(center_point, radius)),
+        }
+        self.save()
+
+    def find_covering(self, center_point, radius, network_type, tolerance_m=50, source=None):
+        """
+        Find the smallest cached region whose bounding box contains the requested one.
+        :param center_point: (latitude, longitude) of the requested center.
+        :param radius: Requested distance in meters.
+        :param network_type: Requested network type.
+        :param tolerance_m: How far (in meters) the request may stick out of a cached box,
+                            so that slightly different geocoding results still match.
+        :param source: Data the graph must have been built from (as passed to add).
+        :return: Cache key of the covering region, or None.
+        """
+        south, west, north, east = bbox_from_point(center_point, max(radius - tolerance_m, 0))
+        best_key, best_radius = None, float("inf")
+        for cache_key, region in self.regions.items():
+            if region["network_type"] != network_type or region.get("source") != source:
+                continue
+            r_south, r_west, r_north, r_east = region["bbox"]
+            if r_south <= south and r_west <= west and north <= r_north and east <= r_east:
+                if region["radius"] < best_radius:
+                    best_key, best_radius = cache_key, region["radius"]
+        return best_key
+
+    def save(self):
+        """Write the index to disk, keeping regions added meanwhile by other processes."""
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for cache_key, region in json.load(f).items():
+                    self.regions.setdefault(cache_key, region)
+        with atomic_write(self.path, "w") as f:
+            json.dump(self.regions, f, indent=2)
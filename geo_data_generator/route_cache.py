@@ -0,0 +1,101 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from cache_io import atomic_write
+
+
+class RouteCache:
+    def __init__(self, graph_hash, maxsize=100000, cache_path=None):
+        """
+        In-memory LRU cache of routes between snapped nodes, with optional on-disk persistence.
+        Safe to share between threads (e.g. the Dash callbacks of a shared OSMManager).
+        :param graph_hash: Hash identifying the graph the routes were computed on.
+        :param maxsize: Maximum number of routes kept in memory.
+        :param cache_path: File used to persist the cache (default: None, memory only).
+        """
+        self.graph_hash = graph_hash
+        self.maxsize = maxsize
+        self.cache_path = cache_path
+        self.routes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.cache_path and os.path.exists(self.cache_path):
+            self.load()
+
+    def _key(self, origin_node, destination_node, weight):
+        return (self.graph_hash, origin_node, destination_node, weight)
+
+    def get(self, origin_node, destination_node, weight="length"):
+        """
+        Look up a cached route.
+        :param origin_node: Snapped origin node ID.
+        :param destination_node: Snapped destination node ID.
+        :param weight: Edge weight the route was optimized for.
+        :return: Tuple (route_nodes, cumulative_m), or None on a miss.
+        """
+        key = self._key(origin_node, destination_node, weight)
+        with self._lock:
+            route = self.routes.get(key)
+            if route is None:
+                self.misses += 1
+                return None
+            self.routes.move_to_end(key)
+            self.hits += 1
+        return route
+
+    def put(self, origin_node, destination_node, route, weight="length"):
+        """
+        Store a route, evicting the least recently used entry if the cache is full.
+        :param origin_node: Snapped origin node ID.
+        :param destination_node: Snapped destination node ID.
+        :param route: Tuple (route_nodes, cumulative_m) to cache.
+        :param weight: Edge weight the route was optimized for.
+        """
+        key = self._key(origin_node, destination_node, weight)
+        with self._lock:
+            self.routes[key] = route
+            self.routes.move_to_end(key)
+            while len(self.routes) > self.maxsize:
+                self.routes.popitem(last=False)
+
+    def stats(self):
+        """
+        Report cache usage.
+        :return: Dictionary with hits, misses, hit rate and current size.
+        """
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self.routes)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": size,
+        }
+
+    def load(self):
+        """Load persisted routes for this graph from disk."""
+        with open(self.cache_path, "rb") as f:
+            data = pickle.load(f)
+        if data.get("graph_hash") != self.graph_hash:
+            print(f"Ignoring route cache {self.cache_path}: built for a different graph.")
+            return
+        with self._lock:
+            self.routes.update(data["routes"])
+            while len(self.routes) > self.maxsize:
+                self.routes.popitem(last=False)
+        print(f"Loaded {len(self.routes)} routes from cache: {self.cache_path}")
+
+    def save(self):
+        """Persist the cached routes to disk, if a cache path is configured."""
+        if not self.cache_path:
+            return
+        # Pickle a snapshot, so other threads can keep using the cache meanwhile
+        with self._lock:
+            routes = OrderedDict(self.routes)
+        with atomic_write(self.cache_path) as f:
+            pickle.dump({"graph_hash": self.graph_hash, "routes": routes}, f)
+        print(f"Saved {len(routes)} routes to cache: {self.cache_path}")
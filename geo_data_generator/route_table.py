@@ -0,0 +1,165 @@
+import threading
+import numpy as np
+from spatial_index import EARTH_RADIUS_M, to_unit_sphere
+
+
+def straight_line_cumulative(lats, lons):
+    """
+    Cumulative great-circle distance along a polyline.
+    :param lats: Array of latitudes.
+    :param lons: Array of longitudes.
+    :return: float64 array whose i-th value is the distance in meters from the first point to the i-th.
+    """
+    chord = np.linalg.norm(np.diff(to_unit_sphere(lats, lons), axis=0), axis=1)
+    return np.concatenate(([0.0], np.cumsum(2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / 2, 0, 1)))))
+
+
+class RouteTable:
+    # Per-point arrays, per-route arrays and coordinates of the points of straight-line routes
+    _ARRAYS = ("_points", "_cumulative_m", "_offsets", "_is_points", "_extra_lats", "_extra_lons")
+
+    def __init__(self, position, node_ids, lats, lons, capacity=1024):
+        """
+        Population-wide table of the routes followed by simulated people.
+        Each distinct route is stored once and referenced by an integer id. A route point takes 8 bytes:
+        the position of its node in the graph arrays (int32) and the distance travelled to it (float32);
+        node IDs and coordinates are read from the graph arrays when needed.
+        :param position: Mapping from node ID to its position in the graph arrays (e.g. NodeIndex.position).
+        :param node_ids: Array of the graph's node IDs.
+        :param lats: Array of the graph's node latitudes.
+        :param lons: Array of the graph's node longitudes.
+        :param capacity: Initial number of route points the arrays can hold (they grow as needed).
+        """
+        self._position = position
+        self._node_ids = node_ids
+        self._graph_lats = lats
+        self._graph_lons = lons
+        self._ids = {}
+        self._lock = threading.Lock()
+
+        # Per-route arrays: start of each route in the point arrays, and whether it was given as
+        # (latitude, longitude) points (straight-line fallbacks), stored in the extra coordinate arrays
+        self._count = 0
+        self._offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._is_points = np.zeros(capacity, dtype=bool)
+
+        # Per-point arrays
+        self._size = 0
+        self._points = np.zeros(capacity, dtype=np.int32)
+        self._cumulative_m = np.zeros(capacity, dtype=np.float32)
+
+        # Coordinates of the points of straight-line routes
+        self._extra_size = 0
+        self._extra_lats = np.zeros(capacity, dtype=np.float64)
+        self._extra_lons = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def offsets(self):
+        """Array of len(self) + 1 offsets: the points of route i are at offsets[i]:offsets[i + 1]."""
+        return self._offsets[:self._count + 1]
+
+    @property
+    def is_points(self):
+        """Boolean array telling which routes were given as (latitude, longitude) points."""
+        return self._is_points[:self._count]
+
+    @property
+    def nbytes(self):
+        """Memory held by the route arrays, in bytes."""
+        return sum(getattr(self, name).nbytes for name in self._ARRAYS)
+
+    def add(self, route_nodes, cumulative_m=None):
+        """
+        Return the id of a route, storing it if it is not in the table yet.
+        :param route_nodes: List of node IDs, or of (latitude, longitude) points for straight-line fallback routes.
+        :param cumulative_m: Optional distance travelled at each point, in meters (as returned by routing);
+                             straight-line distances are used if missing.
+        :return: Integer route id.
+        """
+        is_points = len(route_nodes) > 0 and isinstance(route_nodes[0], (tuple, list))
+        if is_points:
+            key_array = np.asarray(route_nodes, dtype=np.float64).reshape(-1, 2)
+        else:
+            key_array = np.fromiter((self._position[node] for node in route_nodes), dtype=np.int32, count=len(route_nodes))
+        key = (is_points, len(key_array), hash(key_array.tobytes()))
+
+        with self._lock:
+            route_id = self._ids.get(key)
+            if route_id is not None and np.array_equal(self._key_array(route_id), key_array):
+                return route_id
+
+            if is_points:
+                lats, lons = key_array[:, 0], key_array[:, 1]
+                points = np.arange(self._extra_size, self._extra_size + len(key_array))
+                self._reserve(self._ARRAYS[4:], points[-1] + 1)
+                self._extra_lats[points] = lats
+                self._extra_lons[points] = lons
+                self._extra_size += len(points)
+            else:
+                points = key_array
+                lats, lons = np.asarray(self._graph_lats)[points], np.asarray(self._graph_lons)[points]
+            if cumulative_m is None or len(cumulative_m) != len(points):
+                cumulative_m = straight_line_cumulative(lats, lons)
+
+            start, end = self._size, self._size + len(points)
+            route_id = self._count
+            self._reserve(self._ARRAYS[:2], end)
+            self._reserve(self._ARRAYS[2:4], route_id + 2)
+            self._points[start:end] = points
+            self._cumulative_m[start:end] = cumulative_m
+            self._offsets[route_id + 1] = end
+            self._is_points[route_id] = is_points
+            self._size = end
+            self._count += 1
+
+            # On a (very unlikely) hash collision the first route keeps the key and this one is not shared
+            self._ids.setdefault(key, route_id)
+            return route_id
+
+    def _reserve(self, names, size):
+        """Grow (doubling their capacity) the given arrays so they can hold `size` values."""
+        capacity = len(getattr(self, names[0]))
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in names:
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _key_array(self, route_id):
+        if self._is_points[route_id]:
+            return np.column_stack(self.coordinates(route_id))
+        return self._points[self._offsets[route_id]:self._offsets[route_id + 1]]
+
+    def nodes(self, route_id):
+        """
+        :param route_id: Route id.
+        :return: List of the route's node IDs, or of its (latitude, longitude) points for straight-line routes.
+        """
+        if self._is_points[route_id]:
+            lats, lons = self.coordinates(route_id)
+            return list(zip(lats.tolist(), lons.tolist()))
+        return np.asarray(self._node_ids)[self._points[self._offsets[route_id]:self._offsets[route_id + 1]]].tolist()
+
+    def coordinates(self, route_id):
+        """
+        :param route_id: Route id.
+        :return: Tuple (lats, lons) of float64 arrays.
+        """
+        points = self._points[self._offsets[route_id]:self._offsets[route_id + 1]]
+        if self._is_points[route_id]:
+            return self._extra_lats[points], self._extra_lons[points]
+        return np.asarray(self._graph_lats)[points], np.asarray(self._graph_lons)[points]
+
+    def cumulative_m(self, route_id):
+        """
+        :param route_id: Route id.
+        :return: float32 array of the distance travelled at each point of the route, in meters.
+        """
+        return self._cumulative_m[self._offsets[route_id]:self._offsets[route_id + 1]]
@@ -0,0 +1,357 @@
+import heapq
+from functools import cached_property
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from spatial_index import EARTH_RADIUS_M, item_view
+
+ROUTING_STRATEGIES = ("dijkstra", "astar", "bidirectional")
+
+
+def build_edge_table(graph, weight="length"):
+    """
+    Build an edge-cost lookup keyed by (u, v), keeping the smallest weight over parallel edges.
+    :param graph: networkx (Multi)DiGraph as returned by osmnx.
+    :param weight: Edge attribute to use as cost (default: 'length').
+    :return: Dictionary {(u, v): weight}.
+    """
+    table = {}
+    for u, v, w in graph.edges(data=weight, default=1):
+        if (u, v) not in table or w < table[(u, v)]:
+            table[(u, v)] = w
+    return table
+
+
+class CSRGraph:
+    def __init__(self, node_ids, indptr, indices, weights, weight="length", lats=None, lons=None):
+        """
+        Compressed-sparse-row adjacency of a road network, built once per graph.
+        :param node_ids: Array of OSM node IDs; position i is the internal index of the node.
+        :param indptr: int32 array of length n + 1 with the offset of each node's out-edges.
+        :param indices: int32 array with the target index of every edge.
+        :param weights: float32 array with the weight of every edge.
+        :param weight: Name of the edge attribute the weights were taken from.
+        :param lats: float64 array of node latitudes (needed for the 'astar' strategy).
+        :param lons: float64 array of node longitudes (needed for the 'astar' strategy).
+        """
+        self.node_ids = node_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.weight = weight
+        self.lats = lats
+        self.lons = lons
+        self._reverse = None
+
+        # Number of nodes settled by the last search, for benchmarking
+        self.last_settled = 0
+
+    @cached_property
+    def _node_list(self):
+        return item_view(self.node_ids)
+
+    @cached_property
+    def node_index(self):
+        """Map OSM node IDs to internal indices (built on first use)."""
+        return {node: i for i, node in enumerate(self._node_list)}
+
+    @cached_property
+    def _adjacency(self):
+        # Items of memoryviews are plain Python numbers, much faster than numpy scalars inside the
+        # heap loop, and the arrays are not copied (memory-mapped arrays load instantly)
+        return item_view(self.indptr), item_view(self.indices), item_view(self.weights)
+
+    @classmethod
+    def from_networkx(cls, graph, weight="length", edge_table=None):
+        """
+        Build the CSR adjacency from a networkx (Multi)DiGraph.
+        Parallel edges are collapsed to the one with the smallest weight.
+        :param graph: networkx graph as returned by osmnx.
+        :param weight: Edge attribute to use as weight (default: 'length').
+        :param edge_table: Precomputed output of build_edge_table, if already available.
+        :return: CSRGraph instance.
+        """
+        node_ids = np.array(list(graph.nodes))
+        lats = np.fromiter((y for _, y in graph.nodes(data="y")), dtype=np.float64, count=len(node_ids))
+        lons = np.fromiter((x for _, x in graph.nodes(data="x")), dtype=np.float64, count=len(node_ids))
+        node_index = {node: i for i, node in enumerate(node_ids.tolist())}
+        if edge_table is None:
+            edge_table = build_edge_table(graph, weight)
+
+        n = len(node_ids)
+        if edge_table:
+            pairs = np.array([(node_index[u], node_index[v]) for u, v in edge_table], dtype=np.int32)
+            sources, targets = pairs[:, 0], pairs[:, 1]
+            lengths = np.fromiter(edge_table.values(), dtype=np.float32, count=len(edge_table))
+        else:
+            sources = targets = np.empty(0, dtype=np.int32)
+            lengths = np.empty(0, dtype=np.float32)
+
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+
+        return cls(node_ids, indptr, targets[order], lengths[order], weight=weight, lats=lats, lons=lons)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def strong_components(self):
+        """
+        Label the strongly connected components of the graph.
+        :return: int32 array with the component id of each node (by internal index).
+        """
+        n = len(self)
+        adjacency = csr_matrix((np.ones(len(self.indices), dtype=np.int8), self.indices, self.indptr), shape=(n, n))
+        _, labels = connected_components(adjacency, directed=True, connection="strong")
+        return labels.astype(np.int32)
+
+    def shortest_path(self, source, target, strategy="dijkstra"):
+        """
+        Compute the shortest path between two nodes over the CSR arrays.
+        :param source: OSM node ID of the origin.
+        :param target: OSM node ID of the destination.
+        :param strategy: 'dijkstra', 'astar' (great-circle heuristic) or 'bidirectional'.
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the distance to route_nodes[i].
+        :raises nx.NodeNotFound: If either node is not in the graph.
+        :raises nx.NetworkXNoPath: If the destination is unreachable.
+        """
+        if strategy == "astar":
+            return self.astar(source, target)
+        if strategy == "bidirectional":
+            return self.bidirectional(source, target)
+        if strategy != "dijkstra":
+            raise ValueError(f"Invalid routing strategy '{strategy}'. Must be one of {ROUTING_STRATEGIES}.")
+        return self.shortest_path_between([source], [target])
+
+    def astar(self, source, target):
+        """
+        A* search guided by the great-circle distance to the target, which never
+        overestimates the remaining road length.
+        :param source: OSM node ID of the origin.
+        :param target: OSM node ID of the destination.
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the distance to route_nodes[i].
+        :raises nx.NodeNotFound: If either node is not in the graph.
+        :raises nx.NetworkXNoPath: If the destination is unreachable.
+        """
+        if self.lats is None:
+            raise ValueError("A* routing needs node coordinates (lats/lons).")
+        s, t = self._indices_of([source, target])
+
+        # Heuristic for every node at once; shrunk slightly so float32 edge lengths stay admissible
+        heuristic = (self.haversine_to(t) * 0.999).tolist()
+
+        indptr, indices, weights = self._adjacency
+        dist = [float("inf")] * len(self)
+        pred = [-1] * len(self)
+        dist[s] = 0.0
+        heap = [(heuristic[s], 0.0, s)]
+        settled = 0
+
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            settled += 1
+            if u == t:
+                break
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd + heuristic[v], nd, v))
+        else:
+            self.last_settled = settled
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+        self.last_settled = settled
+        return self._extract(pred, dist, t)
+
+    def bidirectional(self, source, target):
+        """
+        Bidirectional Dijkstra: grow a forward search from the origin and a backward search
+        (over reversed edges) from the destination until they meet.
+        :param source: OSM node ID of the origin.
+        :param target: OSM node ID of the destination.
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the distance to route_nodes[i].
+        :raises nx.NodeNotFound: If either node is not in the graph.
+        :raises nx.NetworkXNoPath: If the destination is unreachable.
+        """
+        s, t = self._indices_of([source, target])
+        if s == t:
+            self.last_settled = 0
+            return [source], [0.0]
+        if self._reverse is None:
+            self._reverse = self._build_reverse()
+
+        forward = ({s: 0.0}, {s: -1}, [(0.0, s)], self._adjacency)
+        backward = ({t: 0.0}, {t: -1}, [(0.0, t)], self._reverse)
+        searches = (forward, backward)
+        best, meeting = float("inf"), -1
+        settled = 0
+
+        while forward[2] and backward[2]:
+            # The searches cannot improve once their frontiers together exceed the best path
+            if forward[2][0][0] + backward[2][0][0] >= best:
+                break
+            side = 0 if len(forward[2]) <= len(backward[2]) else 1
+            dist, pred, queue, (indptr, indices, weights) = searches[side]
+            other_dist = searches[1 - side][0]
+
+            d, u = heapq.heappop(queue)
+            if d > dist[u]:
+                continue
+            settled += 1
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(queue, (nd, v))
+                    if v in other_dist and nd + other_dist[v] < best:
+                        best, meeting = nd + other_dist[v], v
+
+        self.last_settled = settled
+        if meeting == -1:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+        forward_dist, forward_pred = forward[0], forward[1]
+        backward_dist, backward_pred = backward[0], backward[1]
+        path = [meeting]
+        while forward_pred[path[-1]] != -1:
+            path.append(forward_pred[path[-1]])
+        path.reverse()
+        cumulative = [forward_dist[i] for i in path]
+
+        # Past the meeting point, distances come from the backward search
+        node = meeting
+        while backward_pred[node] != -1:
+            node = backward_pred[node]
+            path.append(node)
+            cumulative.append(best - backward_dist[node])
+        return [self._node_list[i] for i in path], cumulative
+
+    def haversine_to(self, target_index):
+        """
+        Great-circle distance from every node to one node.
+        :param target_index: Internal index of the reference node.
+        :return: float64 array of distances in meters.
+        """
+        lat1, lon1 = np.radians(self.lats), np.radians(self.lons)
+        lat2, lon2 = lat1[target_index], lon1[target_index]
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+    def _build_reverse(self):
+        """Build the CSR arrays of the reversed graph (in-edges), as item views."""
+        sources = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        indptr = np.zeros(len(self) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.indices, minlength=len(self)), out=indptr[1:])
+        return item_view(indptr), item_view(sources[order]), item_view(self.weights[order])
+
+    def _extract(self, pred, dist, t):
+        path = [t]
+        while pred[path[-1]] != -1:
+            path.append(pred[path[-1]])
+        path.reverse()
+        # Tentative distances along the settled path are the cumulative route lengths
+        return [self._node_list[i] for i in path], [dist[i] for i in path]
+
+    def shortest_path_between(self, sources, targets):
+        """
+        Find the shortest path from any of several origins to the nearest reachable target.
+        A single multi-source search stops as soon as the first target is settled.
+        :param sources: Iterable of OSM node IDs to start from.
+        :param targets: Iterable of OSM node IDs to reach.
+        :return: Tuple (route_nodes, cumulative_m) where cumulative_m[i] is the distance to route_nodes[i].
+        :raises nx.NodeNotFound: If any node is not in the graph.
+        :raises nx.NetworkXNoPath: If no target is reachable from any source.
+        """
+        source_idx = self._indices_of(sources)
+        target_idx = set(self._indices_of(targets))
+
+        indptr, indices, weights = self._adjacency
+        dist = [float("inf")] * len(self)
+        pred = [-1] * len(self)
+        heap = []
+        for s in source_idx:
+            dist[s] = 0.0
+            heap.append((0.0, s))
+        heapq.heapify(heap)
+        settled = 0
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            settled += 1
+            if u in target_idx:
+                t = u
+                break
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        else:
+            self.last_settled = settled
+            raise nx.NetworkXNoPath(f"No path between {list(sources)} and {list(targets)}.")
+
+        self.last_settled = settled
+        return self._extract(pred, dist, t)
+
+    def shortest_path_tree(self, source, targets):
+        """
+        Grow one single-source shortest-path tree and extract the routes to many targets.
+        The search stops once every target has been settled.
+        :param source: OSM node ID of the origin.
+        :param targets: Iterable of OSM node IDs to reach.
+        :return: Dictionary {target: (route_nodes, cumulative_m)} for every reachable target.
+        :raises nx.NodeNotFound: If any node is not in the graph.
+        """
+        (s,) = self._indices_of([source])
+        remaining = set(self._indices_of(targets))
+
+        indptr, indices, weights = self._adjacency
+        dist = [float("inf")] * len(self)
+        pred = [-1] * len(self)
+        dist[s] = 0.0
+        heap = [(0.0, s)]
+        settled = []
+
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u in remaining:
+                remaining.discard(u)
+                settled.append(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+
+        routes = {}
+        for t in settled:
+            path = [t]
+            while path[-1] != s:
+                path.append(pred[path[-1]])
+            path.reverse()
+            routes[self._node_list[t]] = ([self._node_list[i] for i in path], [dist[i] for i in path])
+        return routes
+
+    def _indices_of(self, nodes):
+        try:
+            return [self.node_index[node] for node in nodes]
+        except KeyError as e:
+            raise nx.NodeNotFound(f"Node {e.args[0]} not in graph") from None
@@ -0,0 +1,109 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def to_unit_sphere(lats, lons):
+    """
+    Convert latitude/longitude arrays (degrees) to 3D points on the unit sphere.
+    :param lats: Array-like of latitudes.
+    :param lons: Array-like of longitudes.
+    :return: (N, 3) float64 array of Cartesian coordinates.
+    """
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def item_view(array):
+    """
+    Read-only view of an array whose items are plain Python numbers, for lookups in Python loops.
+    Indexing a memoryview is as fast as indexing a list, without copying the array
+    (memory-mapped arrays stay in the page cache); object arrays are converted to a list.
+    :param array: 1-D array.
+    :return: memoryview (or list for object arrays).
+    """
+    array = np.asarray(array)
+    if array.dtype == object:
+        return array.tolist()
+    return memoryview(np.ascontiguousarray(array))
+
+
+class NodeIndex:
+    def __init__(self, node_ids, lats, lons):
+        """
+        KD-tree over graph nodes on unit-sphere coordinates, built once per graph.
+        Euclidean (chord) distance on the sphere is monotonic in great-circle distance,
+        so nearest neighbours match a haversine search.
+        :param node_ids: Array-like of node IDs.
+        :param lats: Array-like of node latitudes (y).
+        :param lons: Array-like of node longitudes (x).
+        """
+        self.node_ids = np.asarray(node_ids)
+        self._node_list = item_view(self.node_ids)
+        self.position = {node: i for i, node in enumerate(self._node_list)}
+        self.xyz = to_unit_sphere(lats, lons)
+        self.tree = cKDTree(self.xyz)
+
+        # Optional connected-component labels (see set_components)
+        self.components = None
+        self.largest_component = None
+        self._largest_positions = None
+        self._largest_tree = None
+
+    def query(self, points):
+        """
+        Snap many points to their nearest nodes in one call.
+        :param points: Sequence or (N, 2) array of (latitude, longitude).
+        :return: Tuple (node_ids, distances_m) as a list of node IDs and a float array in meters.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        chord, positions = self.tree.query(to_unit_sphere(points[:, 0], points[:, 1]))
+        distances_m = 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / 2, 0, 1))
+        return [self._node_list[i] for i in positions], distances_m
+
+    def set_components(self, labels):
+        """
+        Attach a component id to every node and index the largest component separately.
+        :param labels: Array-like of component ids aligned with the node order of the index.
+        """
+        self.components = np.asarray(labels)
+        self.largest_component = int(np.bincount(self.components).argmax())
+        self._largest_positions = np.flatnonzero(self.components == self.largest_component)
+        self._largest_tree = cKDTree(self.xyz[self._largest_positions])
+
+    def component_of(self, node):
+        """
+        :param node: Node ID present in the index.
+        :return: Component id of the node.
+        """
+        return int(self.components[self.position[node]])
+
+    def query_in_component(self, point, component, max_candidates=4096):
+        """
+        Snap a point to its nearest node inside a given component.
+        :param point: (latitude, longitude) of the query point.
+        :param component: Component id the node must belong to.
+        :param max_candidates: Maximum number of nearest nodes inspected for small components.
+        :return: Tuple (node_id, distance_m), or (None, inf) if no node was found.
+        """
+        center = to_unit_sphere([point[0]], [point[1]])[0]
+        if component == self.largest_component:
+            chord, i = self._largest_tree.query(center)
+            position = self._largest_positions[i]
+            return self._node_list[position], 2 * EARTH_RADIUS_M * np.arcsin(min(chord / 2, 1))
+
+        n = len(self._node_list)
+        k = 16
+        while True:
+            chords, positions = self.tree.query(center, k=min(k, n))
+            chords, positions = np.atleast_1d(chords), np.atleast_1d(positions)
+            matches = np.flatnonzero(self.components[positions] == component)
+            if len(matches):
+                chord, position = chords[matches[0]], positions[matches[0]]
+                return self._node_list[position], 2 * EARTH_RADIUS_M * np.arcsin(min(chord / 2, 1))
+            if k >= min(n, max_candidates):
+                return None, float("inf")
+            k *= 4
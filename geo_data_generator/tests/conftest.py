@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import networkx as nx
+import pytest
+from geopy.distance import great_circle
+
+# The modules are imported top-level, as when running from the geo_data_generator directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def street_grid(side=12, seed=0):
+    """
+    Build a small street-like MultiDiGraph: a grid of two-way and one-way streets with some
+    parallel edges, plus a separate two-node component. Street lengths are never shorter than
+    the great-circle distance between their ends, as on real roads.
+    :param side: Number of nodes per grid row and column.
+    :param seed: Random seed.
+    :return: networkx MultiDiGraph with 'y'/'x' node coordinates and 'length' edge weights.
+    """
+    rng = random.Random(seed)
+    graph = nx.MultiDiGraph(crs="epsg:4326")
+    for i in range(side):
+        for j in range(side):
+            graph.add_node(1000 + i * side + j, y=48.85 + i * 0.001, x=2.35 + j * 0.0015)
+    for i in range(side):
+        for j in range(side):
+            u = 1000 + i * side + j
+            for di, dj in ((0, 1), (1, 0)):
+                if i + di == side or j + dj == side or rng.random() < 0.1:
+                    continue
+                v = 1000 + (i + di) * side + j + dj
+                ends = [(graph.nodes[node]["y"], graph.nodes[node]["x"]) for node in (u, v)]
+                distance = great_circle(*ends).meters
+                length = distance * rng.uniform(1.0, 1.4)
+                graph.add_edge(u, v, length=length)
+                if rng.random() < 0.8:
+                    graph.add_edge(v, u, length=length * rng.uniform(1.0, 1.2))
+                if rng.random() < 0.1:
+                    graph.add_edge(u, v, length=distance * rng.uniform(1.0, 1.4))
+    graph.add_node(1, y=48.80, x=2.30)
+    graph.add_node(2, y=48.80, x=2.301)
+    graph.add_edge(1, 2, length=70.0)
+    graph.add_edge(2, 1, length=70.0)
+    return graph
+
+
+@pytest.fixture(scope="session")
+def grid_graph():
+    return street_grid()
+
+
+# Center and radius of an OSMManager area covering the street grid
+GRID_CENTER = (48.8555, 2.358)
+GRID_RADIUS = 1000
+
+
+@pytest.fixture
+def make_manager(grid_graph, tmp_path, monkeypatch):
+    """
+    Build OSMManagers on the street grid, in a temporary cache directory: the graph download returns the grid.
+    :return: Function taking OSMManager keyword arguments and returning an OSMManager.
+    """
+    import osm_integration
+
+    monkeypatch.setattr(osm_integration.ox, "graph_from_point", lambda *args, **kwargs: grid_graph.copy())
+
+    def make(**kwargs):
+        kwargs.setdefault("cache_dir", str(tmp_path / "graph_cache"))
+        return osm_integration.OSMManager(GRID_CENTER, GRID_RADIUS, **kwargs)
+
+    return make
@@ -0,0 +1,22 @@
+import os
+import pytest
+from cache_io import atomic_write
+
+
+def test_atomic_write(tmp_path):
+    path = str(tmp_path / "data.txt")
+    with atomic_write(path, "w") as f:
+        f.write("first")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path, "w") as f:
+            f.write("partial")
+            raise RuntimeError("interrupted")
+    # A failed write leaves the previous file and no temporary file
+    with open(path) as f:
+        assert f.read() == "first"
+    assert os.listdir(tmp_path) == ["data.txt"]
+
+    with atomic_write(path) as f:
+        f.write(b"second")
+    with open(path, "rb") as f:
+        assert f.read() == b"second"
@@ -0,0 +1,72 @@
+import json
+import os
+import networkx as nx
+import numpy as np
+import pytest
+from graph_store import graph_digest, has_graph_arrays, load_graph_arrays, save_graph_arrays, crop_graph_arrays
+from routing import CSRGraph
+
+
+@pytest.fixture(scope="module")
+def csr_graph(grid_graph):
+    return CSRGraph.from_networkx(grid_graph, weight="length")
+
+
+def test_round_trip(csr_graph, tmp_path):
+    directory = str(tmp_path / "graph")
+    assert not has_graph_arrays(directory)
+    components = csr_graph.strong_components()
+    save_graph_arrays(directory, csr_graph, components, crs="epsg:4326")
+    assert has_graph_arrays(directory)
+
+    loaded, loaded_components, meta = load_graph_arrays(directory)
+    assert isinstance(loaded.indices, np.memmap)
+    assert meta["crs"] == "epsg:4326" and meta["nodes"] == len(csr_graph)
+    np.testing.assert_array_equal(loaded_components, components)
+    assert graph_digest(loaded) == graph_digest(csr_graph)
+    for source, target in [(1000, 1143), (1143, 1000), (1005, 1130)]:
+        assert loaded.shortest_path(source, target) == csr_graph.shortest_path(source, target)
+
+
+def test_incomplete_or_unknown_cache(csr_graph, tmp_path):
+    directory = str(tmp_path / "graph")
+    save_graph_arrays(directory, csr_graph, csr_graph.strong_components())
+    meta_path = os.path.join(directory, "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["version"] = -1
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        load_graph_arrays(directory)
+
+    os.remove(os.path.join(directory, "weights.npy"))
+    assert not has_graph_arrays(directory)
+
+
+def test_manager_loads_compact_cache(make_manager, monkeypatch):
+    expected = make_manager().find_route(1000, 1143)
+    # Later managers memory-map the arrays, without the pickled graph or a download
+    monkeypatch.setattr("pickle.load", lambda *args: pytest.fail("The pickled graph was read."))
+    monkeypatch.setattr("osmnx.graph_from_point", lambda *args, **kwargs: pytest.fail("The graph was downloaded."))
+    manager = make_manager()
+    assert isinstance(manager.csr_graph.weights, np.memmap)
+    assert manager.find_route(1000, 1143) == expected
+
+
+def test_crop_matches_networkx_subgraph(grid_graph, csr_graph):
+    lats = np.asarray(csr_graph.lats)
+    keep = (lats > 48.8515) & (lats < 48.8585)
+    cropped = crop_graph_arrays(csr_graph, keep)
+    subgraph = grid_graph.subgraph(np.asarray(csr_graph.node_ids)[keep].tolist())
+    expected = CSRGraph.from_networkx(subgraph, weight="length")
+    assert sorted(cropped.node_ids.tolist()) == sorted(subgraph.nodes)
+    assert len(cropped.indices) == len(expected.indices)
+    for source, target in [(1024, 1105), (1105, 1024), (1030, 1099)]:
+        try:
+            length = nx.shortest_path_length(subgraph, source, target, weight="length")
+        except nx.NetworkXNoPath:
+            with pytest.raises(nx.NetworkXNoPath):
+                cropped.shortest_path(source, target)
+            continue
+        assert cropped.shortest_path(source, target)[1][-1] == pytest.approx(length, rel=1e-5)
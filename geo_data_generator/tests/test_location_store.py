@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+import shapely
+from poi_index import POIIndex
+from poi_scan import LocationFrames, LocationStore
+
+
+class Loader:
+    def __init__(self, delay=0.0, error=None):
+        """Stand-in for OSMManager._scan_categories, recording its calls."""
+        self.calls = []
+        self.delay = delay
+        self.error = error
+
+    def __call__(self, categories):
+        self.calls.append(list(categories))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {category: POIIndex([shapely.Point(2.35, 48.85)] * (i + 1)) for i, category in enumerate(categories)}
+
+
+def test_categories_load_on_first_access():
+    loader = Loader()
+    store = LocationStore(loader, categories=["parks", "schools", "gyms"])
+    assert loader.calls == [] and not store.is_loaded("parks")
+    assert len(store["parks"]) == 1
+    assert store.is_loaded("parks") and not store.is_loaded("schools")
+
+    store.load(["parks", "schools", "gyms"])
+    assert loader.calls == [["parks"], ["schools", "gyms"]]
+    assert store["parks"] is store["parks"]
+    with pytest.raises(KeyError):
+        store["unknown"]
+
+
+def test_concurrent_accesses_share_one_scan():
+    loader = Loader(delay=0.2)
+    store = LocationStore(loader, categories=["parks", "schools"])
+    warm = store.warm()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store["schools"])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    warm.result()
+    assert loader.calls == [["parks", "schools"]]
+    assert all(result is results[0] for result in results)
+
+
+def test_failed_scan_reaches_every_caller():
+    store = LocationStore(Loader(error=RuntimeError("Overpass is down")), categories=["parks"])
+    with pytest.raises(RuntimeError):
+        store["parks"]
+    with pytest.raises(RuntimeError):
+        store.warm(["parks"]).result()
+
+
+def test_set_and_frames():
+    loader = Loader()
+    store = LocationStore(loader, categories=["parks"])
+    frames = LocationFrames(store)
+    store.set("custom", POIIndex([shapely.box(2.35, 48.85, 2.36, 48.86)]))
+    assert list(store) == ["parks", "custom"] and loader.calls == []
+    assert frames["custom"].geom_type.tolist() == ["Polygon"]
+
+    # Frames follow the store when a category is replaced
+    store.set("custom", POIIndex([]))
+    assert frames["custom"].empty
+
+
+def test_manager_does_not_scan_on_construction(make_manager, monkeypatch):
+    import osm_integration
+    monkeypatch.setattr(osm_integration.ox, "features_from_point", lambda *args, **kwargs: pytest.fail("Scanned."))
+    manager = make_manager()
+    assert not any(manager.poi_index.is_loaded(category) for category in manager.poi_index)
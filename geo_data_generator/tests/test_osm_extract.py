@@ -0,0 +1,121 @@
+import gzip
+import shutil
+import pytest
+from osm_extract import OSMExtract, iter_osm_elements
+
+EXTRACT_CENTER = (48.8525, 2.35375)
+
+
+def grid_node(i, j):
+    return 100 + i * 6 + j
+
+
+def extract_xml():
+    """
+    A small OSM XML extract: a 6 x 6 grid of residential streets (one one-way, one reversed one-way),
+    a footway, a tertiary road leaving and re-entering the area, a park, a hospital multipolygon and
+    two schools, one of them outside the area.
+    """
+    nodes = {grid_node(i, j): (48.850 + i * 0.001, 2.350 + j * 0.0015) for i in range(6) for j in range(6)}
+    nodes.update({900: (48.80, 2.351), 901: (48.80, 2.355)})
+    park = {200: (48.8512, 2.3512), 201: (48.8512, 2.3518), 202: (48.8516, 2.3518), 203: (48.8516, 2.3512)}
+    hospital = {210: (48.8542, 2.3542), 211: (48.8542, 2.355), 212: (48.8548, 2.355), 213: (48.8548, 2.3542)}
+    nodes.update(park)
+    nodes.update(hospital)
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6" generator="test">']
+    for node, (lat, lon) in nodes.items():
+        lines.append(f'<node id="{node}" version="1" user="mapper" lat="{lat}" lon="{lon}"/>')
+    lines.append('<node id="300" version="1" lat="48.8531" lon="2.3521"><tag k="amenity" v="school"/></node>')
+    lines.append('<node id="301" version="1" lat="48.80" lon="2.3521"><tag k="amenity" v="school"/></node>')
+
+    def way(way_id, refs, tags):
+        lines.append(f'<way id="{way_id}" version="1">')
+        lines.extend(f'<nd ref="{ref}"/>' for ref in refs)
+        lines.extend(f'<tag k="{k}" v="{v}"/>' for k, v in tags.items())
+        lines.append("</way>")
+
+    oneway = {2: {"oneway": "yes"}, 3: {"oneway": "-1"}}
+    for i in range(6):
+        way(1000 + i, [grid_node(i, j) for j in range(6)], {"highway": "residential", **oneway.get(i, {})})
+    for j in range(6):
+        way(2000 + j, [grid_node(i, j) for i in range(6)], {"highway": "residential"})
+    way(3000, [grid_node(0, 0), grid_node(1, 1), grid_node(2, 2)], {"highway": "footway"})
+    way(4000, [grid_node(0, 0), grid_node(1, 1), 900, 901, grid_node(4, 4), grid_node(5, 5)], {"highway": "tertiary"})
+    way(5000, [200, 201, 202, 203, 200], {"leisure": "park", "name": "Square"})
+    way(5001, [210, 211, 212, 213, 210], {})
+    lines.append('<relation id="6000" version="1"><member type="way" ref="5001" role="outer"/>'
+                 '<tag k="type" v="multipolygon"/><tag k="amenity" v="hospital"/></relation>')
+    lines.append("</osm>")
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="module")
+def extract_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("extract") / "area.osm"
+    path.write_text(extract_xml())
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def extract(extract_path):
+    return OSMExtract(extract_path, EXTRACT_CENTER, 400, feature_keys=["amenity", "leisure"])
+
+
+def test_compressed_extract(extract_path, tmp_path):
+    compressed = str(tmp_path / "area.osm.gz")
+    with open(extract_path, "rb") as source, gzip.open(compressed, "wb") as target:
+        shutil.copyfileobj(source, target)
+    assert list(iter_osm_elements(compressed)) == list(iter_osm_elements(extract_path))
+
+
+def test_drive_graph(extract):
+    graph = extract.graph("drive", simplify=False)
+    assert set(graph.nodes) == {grid_node(i, j) for i in range(6) for j in range(6)}
+    edges = {(u, v): data for u, v, data in graph.edges(data=True)}
+    # Two-way and one-way streets
+    assert (grid_node(0, 0), grid_node(0, 1)) in edges and (grid_node(0, 1), grid_node(0, 0)) in edges
+    assert (grid_node(2, 0), grid_node(2, 1)) in edges and (grid_node(2, 1), grid_node(2, 0)) not in edges
+    assert (grid_node(3, 1), grid_node(3, 0)) in edges and (grid_node(3, 0), grid_node(3, 1)) not in edges
+    # Both parts of the road crossing the area, under the road's own ID; the footway is left out
+    assert edges[(grid_node(0, 0), grid_node(1, 1))]["osmid"] == 4000
+    assert edges[(grid_node(4, 4), grid_node(5, 5))]["osmid"] == 4000
+    assert all(data["length"] > 0 for data in edges.values())
+    assert {data["osmid"] for data in edges.values()} == {1000 + i for i in range(6)} | {2000 + j for j in range(6)} | {4000}
+
+    simplified = extract.graph("drive")
+    assert len(simplified) < len(graph)
+    assert extract.graph("walk", simplify=False).has_edge(grid_node(1, 1), grid_node(2, 2))
+
+
+def test_features(extract):
+    features = extract.features({"amenity": ["school", "hospital"], "leisure": "park"})
+    assert sorted(features.index.tolist()) == [("node", 300), ("relation", 6000), ("way", 5000)]
+    assert features.loc[("way", 5000), "name"] == "Square"
+    # Features can be built again (osmnx must not consume the extract's elements)
+    assert len(extract.features({"amenity": "school"})) == 1
+
+
+def test_manager_builds_from_extract(extract_path, tmp_path, monkeypatch):
+    import os
+    import osm_integration
+    monkeypatch.setattr(osm_integration.ox, "graph_from_point", lambda *args, **kwargs: pytest.fail("Downloaded."))
+    monkeypatch.setattr(osm_integration.ox, "features_from_point", lambda *args, **kwargs: pytest.fail("Downloaded."))
+    cache_dir = str(tmp_path / "graph_cache")
+
+    manager = osm_integration.OSMManager(EXTRACT_CENTER, 400, cache_dir=cache_dir, osm_extract=extract_path)
+    assert set(manager.csr_graph.node_ids.tolist()) <= {grid_node(i, j) for i in range(6) for j in range(6)}
+    assert len(manager.locations["schools"]) == 1 and len(manager.locations["parks"]) == 1
+
+    # A graph built from the extract is only reused while the extract is unchanged
+    again = osm_integration.OSMManager(EXTRACT_CENTER, 400, cache_dir=cache_dir, osm_extract=extract_path)
+    assert again.cache_key == manager.cache_key
+    os.utime(extract_path, ns=(0, os.stat(extract_path).st_mtime_ns + 10**9))
+    changed = osm_integration.OSMManager(EXTRACT_CENTER, 400, cache_dir=cache_dir, osm_extract=extract_path)
+    assert changed.cache_key != manager.cache_key
+    assert changed.graph_digest == manager.graph_digest
+
+    # Nor is it cropped for requests without the extract
+    regions = osm_integration.RegionIndex(cache_dir)
+    assert regions.find_covering(EXTRACT_CENTER, 200, "drive", source=changed._data_source()) == changed.cache_key
+    assert regions.find_covering(EXTRACT_CENTER, 200, "drive") is None
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+
+def random_pairs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.column_stack((rng.uniform(48.85, 48.861, 2 * count), rng.uniform(2.35, 2.3665, 2 * count)))
+    return [(tuple(points[2 * i]), tuple(points[2 * i + 1])) for i in range(count)]
+
+
+def assert_same_trajectory(trajectory, expected):
+    assert trajectory["route_nodes"] == expected["route_nodes"]
+    assert trajectory["distance_m"] == pytest.approx(expected["distance_m"])
+    assert trajectory["travel_time_s"] == pytest.approx(expected["travel_time_s"])
+
+
+def test_batch_matches_single_trajectories(make_manager):
+    pairs = random_pairs(40)
+    # Repeated origins share a search, and a pair ending in the separate component is re-snapped
+    pairs += [(pairs[0][0], pairs[1][1]), (pairs[0][0], (48.8001, 2.3003))]
+    speeds = np.linspace(1.0, 15.0, len(pairs)).tolist()
+
+    batch = make_manager().build_trajectories_batch(pairs, speeds)
+    single = make_manager(route_cache_size=0)
+    assert len(batch) == len(pairs)
+    for trajectory, (depart, arrival), speed_m_s in zip(batch, pairs, speeds):
+        assert_same_trajectory(trajectory, single.build_trajectory(depart, arrival, speed_m_s))
+
+
+def test_endpoints_in_separate_components(make_manager):
+    # Node 1 lies in a small component about 6 km from the street grid
+    near_node_1, in_grid = (48.8001, 2.2999), (48.855, 2.358)
+    manager = make_manager()
+    assert manager.snap_pair(near_node_1, (48.8001, 2.3012)) == (1, 2)
+
+    # Too far to re-snap: straight line between the original points
+    assert manager.snap_pair(near_node_1, in_grid) is None
+    trajectory = manager.build_trajectory(near_node_1, in_grid)
+    assert trajectory["route_nodes"] == [near_node_1, in_grid]
+    assert trajectory["distance_m"] == pytest.approx(manager.straight_line_distance(near_node_1, in_grid))
+
+    # Within reach: the departure moves into the grid, where the arrival already is
+    manager.max_resnap_m = 10000
+    depart_node, arrival_node = manager.snap_pair(near_node_1, in_grid)
+    assert depart_node == manager.node_index.query_in_component(near_node_1, manager.node_index.largest_component)[0]
+    assert arrival_node == manager.get_nearest_node(in_grid)
+    trajectory = manager.build_trajectory(near_node_1, in_grid)
+    assert trajectory["route_nodes"][0] == depart_node and trajectory["route_nodes"][-1] == arrival_node
+
+
+def test_compact_reports_released_bytes(make_manager):
+    import shapely
+    from poi_index import POIIndex
+    manager = make_manager()
+    manager.edges, manager.nodes
+    manager.poi_index.set("parks", POIIndex([shapely.box(2.35, 48.85, 2.351, 48.851)]))
+    route = manager.find_route(1000, 1143)
+
+    edges = manager.graph.number_of_edges()
+    report = manager.compact()
+    assert report["graph_bytes"] > 100 * edges
+    assert report["frames_bytes"] > 0
+    assert report["location_bytes"] == 5 * 16
+    assert manager._graph is None and manager.poi_index["parks"].geometry is None
+    # Routing only needs the arrays; the released graph is reloaded from the cache when asked for
+    assert manager.find_route(1000, 1143) == route
+    assert manager.graph.number_of_edges() == edges
+
+
+def test_compact_reports_what_was_never_loaded(make_manager):
+    make_manager()
+    # Loaded from the compact cache: neither the networkx graph nor its DataFrames were ever built
+    manager = make_manager()
+    assert manager.compact() == {"graph_bytes": None, "frames_bytes": None, "location_bytes": None}
+    assert manager._graph is None
+
+
+def test_build_locks_are_released(make_manager):
+    import osm_integration
+    make_manager(contraction_hierarchy=True)
+    make_manager()
+    assert osm_integration._build_locks == {}
@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from models.Person import Person
+
+
+class Walker(Person):
+    def build_general_schedule(self):
+        raise AssertionError("A restored person must keep its saved schedule.")
+
+
+@pytest.fixture
+def manager(make_manager):
+    return make_manager()
+
+
+@pytest.fixture
+def person(manager):
+    waypoints = {
+        "home": (48.851, 2.351),
+        "work": (48.86, 2.364),
+        "park": (48.8005, 2.3005),  # Not connected to the others: straight-line route
+        "home_door": (48.851, 2.351),  # Same node as home: the movement takes no time
+    }
+    schedule = [
+        {"start_time": "08:00", "start_waypoint": "home", "end_waypoint": "work"},
+        {"start_time": "12:30", "start_waypoint": "work", "end_waypoint": "park"},
+        {"start_time": "17:00", "start_waypoint": "park", "end_waypoint": "home"},
+        {"start_time": "20:00", "start_waypoint": "home", "end_waypoint": "home_door"},
+        {"start_time": "23:55", "start_waypoint": "home", "end_waypoint": "work"},
+    ]
+    return Person(1, "adult", 1.4, manager, predefined_waypoints=waypoints, schedule=schedule, mode="self_chosen")
+
+
+def sample_times(count=500):
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 1, 1)
+    return [start + timedelta(seconds=int(s)) for s in rng.uniform(0, 86400, count)]
+
+
+def assert_same_person(restored, person):
+    assert json.loads(json.dumps(restored.to_dict())) == json.loads(json.dumps(person.to_dict()))
+    times = sample_times()
+    positions = restored.get_positions_at_times(times)
+    assert not np.isnan(positions).any()
+    np.testing.assert_allclose(positions, person.get_positions_at_times(times))
+
+
+def test_dict_round_trip(person, manager):
+    data = json.loads(json.dumps(person.to_dict()))
+    assert_same_person(Person.from_dict(data, manager), person)
+
+
+def test_bytes_round_trip(person, manager):
+    pytest.importorskip("msgpack")
+    data = person.to_bytes()
+    assert isinstance(data, bytes)
+    assert_same_person(Person.from_bytes(data, manager), person)
+
+
+def test_restore_keeps_schedule_and_shares_routes(person, manager):
+    pytest.importorskip("msgpack")
+    routes = len(manager.route_table)
+    restored = [Walker.from_dict(person.to_dict(), manager), Walker.from_bytes(person.to_bytes(), manager)]
+    for walker in restored:
+        assert isinstance(walker, Walker)
+        assert_same_person(walker, person)
+    # Restored movements reuse the routes already in the table
+    assert len(manager.route_table) == routes
+
+
+def test_positions_match_single_lookups(person):
+    times = sample_times(50)
+    positions = person.get_positions_at_times(times)
+    assert positions.shape == (50, 2) and not np.isnan(positions).any()
+    for when, position in zip(times, positions):
+        assert person.get_position_at_time(when)[0] == pytest.approx(tuple(position))
+
+
+
+def test_positions_along_the_day(person):
+    day = datetime(2024, 1, 1)
+    home, work, park = (person.waypoints[name] for name in ("home", "work", "park"))
+    positions = person.get_positions_at_times([day.replace(hour=h) for h in (7, 12, 16, 23)])
+    np.testing.assert_allclose(positions, [home, work, park, home], atol=2e-3)
+
+    # Halfway along the straight line to the park
+    movement = person.detail_schedule[1]
+    halfway = day.replace(hour=12, minute=30) + timedelta(seconds=movement.travel_time_s / 2)
+    start, end = np.array(movement.routes.coordinates(movement.route_id)).T
+    np.testing.assert_allclose(person.get_positions_at_times([halfway])[0], (start + end) / 2, atol=1e-6)
+
+
+def test_zero_duration_and_past_midnight_movements(person):
+    day = datetime(2024, 1, 1)
+    to_door, night_shift = person.detail_schedule[3], person.detail_schedule[4]
+    assert to_door.travel_time_s == 0
+    np.testing.assert_allclose(
+        person.get_positions_at_times([day.replace(hour=20), day.replace(hour=20, second=1)]),
+        [person.waypoints["home_door"]] * 2, atol=1e-3,
+    )
+
+    # The last movement arrives after midnight: as in the per-movement search it replaced, times after its
+    # start count as arrived, and times before 08:00 wait at home for the first movement
+    assert night_shift.arrival_s < night_shift.start_s
+    positions = person.get_positions_at_times([day.replace(hour=23, minute=58), day.replace(minute=1)])
+    assert not np.isnan(positions).any()
+    np.testing.assert_allclose(positions, [person.waypoints["work"], person.waypoints["home"]])
+
+def test_identical_movements_share_a_route(person, manager):
+    morning, night_shift = person.detail_schedule[0], person.detail_schedule[4]
+    assert night_shift.route_id == morning.route_id and night_shift.routes is manager.route_table
+
+
+def test_unsupported_binary_version(person, manager):
+    msgpack = pytest.importorskip("msgpack")
+    state = msgpack.unpackb(person.to_bytes())
+    state["version"] = -1
+    with pytest.raises(ValueError):
+        Person.from_bytes(msgpack.packb(state), manager)
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+import shapely
+from geopy.distance import great_circle
+from poi_index import POIIndex
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(0)
+    lons, lats = rng.uniform(2.30, 2.40, 60), rng.uniform(48.82, 48.88, 60)
+    # Points and small squares, whose centroids are their centers
+    geometry = [
+        shapely.Point(lon, lat) if i % 2 else shapely.box(lon - 0.001, lat - 0.001, lon + 0.001, lat + 0.001)
+        for i, (lon, lat) in enumerate(zip(lons, lats))
+    ]
+    return POIIndex(geometry)
+
+
+def test_nearest_matches_brute_force(index):
+    points = np.random.default_rng(1).uniform((48.82, 2.30), (48.88, 2.40), (30, 2))
+    positions, distances_m = index.nearest(points, k=3)
+    assert positions.shape == distances_m.shape == (30, 3)
+    for point, nearest, nearest_m in zip(points, positions, distances_m):
+        distances = np.array([great_circle(point, centroid).meters for centroid in index.centroids])
+        np.testing.assert_array_equal(nearest, np.argsort(distances)[:3])
+        np.testing.assert_allclose(nearest_m, distances[nearest], rtol=1e-6)
+
+    positions, distances_m = index.nearest(points[0])
+    assert positions.shape == distances_m.shape == (1,)
+
+
+def test_nearest_survives_compact(index):
+    points = [(48.85, 2.35), (48.83, 2.39)]
+    expected = index.nearest(points)
+    assert index.compact() == (30 * 5 + 30) * 16
+    assert index.geometry is None
+    np.testing.assert_array_equal(index.nearest(points)[0], expected[0])
+    assert index.to_geodataframe().geom_type.eq("Point").all()
+
+
+def test_empty_index():
+    with pytest.raises(ValueError):
+        POIIndex([]).nearest([(48.85, 2.35)])
+
+
+@pytest.fixture(params=["constrained", "clipped"])
+def sampler_class(request, monkeypatch):
+    """PolygonSampler with shapely's constrained triangulation, and with the fallback for shapely < 2.1."""
+    if request.param == "clipped":
+        monkeypatch.delattr(shapely, "constrained_delaunay_triangles", raising=False)
+    elif not hasattr(shapely, "constrained_delaunay_triangles"):
+        pytest.skip("shapely < 2.1")
+    from poi_index import PolygonSampler
+    return PolygonSampler
+
+
+def test_sampler_points_inside_and_area_weighted(sampler_class):
+    l_shape = shapely.Polygon([(2.30, 48.80), (2.32, 48.80), (2.32, 48.805), (2.305, 48.805), (2.305, 48.82), (2.30, 48.82)])
+    with_hole = shapely.box(2.33, 48.80, 2.35, 48.82).difference(shapely.box(2.335, 48.805, 2.345, 48.815))
+    polygons = [l_shape, with_hole, shapely.box(2.36, 48.80, 2.38, 48.81)]
+    sampler = sampler_class(polygons + [shapely.Point(2.39, 48.80), shapely.LineString([(2.39, 48.8), (2.4, 48.81)])])
+
+    points = sampler.sample(20000, rng=np.random.default_rng(0))
+    assert points.shape == (20000, 2)
+    lons, lats = points[:, 1], points[:, 0]
+    inside = np.array([shapely.contains_xy(shapely.buffer(polygon, 1e-9), lons, lats) for polygon in polygons])
+    assert inside.any(axis=0).all()
+    areas = np.array([polygon.area for polygon in polygons])
+    np.testing.assert_allclose(inside.mean(axis=1), areas / areas.sum(), atol=0.015)
+
+
+def test_sampler_without_polygons(sampler_class):
+    sampler = sampler_class([shapely.Point(2.35, 48.85)])
+    assert len(sampler) == 0
+    with pytest.raises(ValueError):
+        sampler.sample(1)
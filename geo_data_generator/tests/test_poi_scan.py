@@ -0,0 +1,80 @@
+import json
+import pytest
+from poi_scan import POI_CATEGORIES, features_from_cache, merge_tags, select_category
+
+CENTER = (48.8555, 2.358)
+
+
+def square(first_id, lat, lon, size=0.0004):
+    """Nodes and closed way of a small square, as in an Overpass response."""
+    corners = [(lat, lon), (lat, lon + size), (lat + size, lon + size), (lat + size, lon)]
+    nodes = [{"type": "node", "id": first_id + i, "lat": y, "lon": x} for i, (y, x) in enumerate(corners)]
+    way = {"type": "way", "id": first_id, "nodes": [first_id + i for i in range(4)] + [first_id]}
+    return nodes, way
+
+
+def overpass_elements():
+    park_nodes, park = square(10, 48.855, 2.357)
+    park["tags"] = {"leisure": "park", "name": "Square"}
+    outer_nodes, outer = square(20, 48.856, 2.359)
+    hospital = {
+        "type": "relation", "id": 30, "tags": {"type": "multipolygon", "amenity": "hospital"},
+        "members": [{"type": "way", "ref": 20, "role": "outer"}],
+    }
+    points = [
+        {"type": "node", "id": 1, "lat": 48.8552, "lon": 2.3581, "tags": {"amenity": "school"}},
+        {"type": "node", "id": 2, "lat": 48.8553, "lon": 2.3582, "tags": {"shop": "supermarket"}},
+        {"type": "node", "id": 3, "lat": 48.8554, "lon": 2.3583, "tags": {"amenity": "bench"}},
+        # Outside the requested area
+        {"type": "node", "id": 4, "lat": 48.90, "lon": 2.358, "tags": {"amenity": "school"}},
+    ]
+    return points + park_nodes + outer_nodes + [park, outer, hospital]
+
+
+@pytest.fixture
+def osmnx_cache(tmp_path, monkeypatch):
+    import osmnx as ox
+    monkeypatch.setattr(ox.settings, "cache_folder", str(tmp_path))
+    elements = overpass_elements()
+    # Two cached queries sharing elements, and a geocoder result
+    for name, part in (("a", elements[:6]), ("b", elements[2:]), ("geocoder", None)):
+        with open(tmp_path / f"{name}.json", "w") as f:
+            json.dump({"elements": part} if part is not None else [{"lat": "48.85"}], f)
+    return tmp_path
+
+
+def test_features_from_cache(osmnx_cache):
+    features = features_from_cache(CENTER, 500, merge_tags(POI_CATEGORIES))
+    assert sorted(features.index.tolist()) == [("node", 1), ("node", 2), ("relation", 30), ("way", 10)]
+    assert features.loc[("way", 10), "geometry"].geom_type == "Polygon"
+    assert features.loc[("relation", 30), "geometry"].geom_type in ("Polygon", "MultiPolygon")
+    assert features.loc[("way", 10), "name"] == "Square"
+
+
+def test_merge_tags():
+    merged = merge_tags({"a": {"amenity": "school", "office": True}, "b": {"amenity": ["clinic", "school"]},
+                         "c": {"office": "it", "leisure": "park"}})
+    assert merged == {"amenity": ["school", "clinic"], "office": True, "leisure": ["park"]}
+
+
+def test_merged_scan_matches_category_queries(osmnx_cache):
+    merged = features_from_cache(CENTER, 500, merge_tags(POI_CATEGORIES))
+    for category, tags in POI_CATEGORIES.items():
+        try:
+            expected = sorted(features_from_cache(CENTER, 500, tags).index.tolist())
+        except Exception:
+            # osmnx raises when no feature matches
+            expected = []
+        assert sorted(select_category(merged, tags).index.tolist()) == expected, category
+
+
+def test_manager_scans_categories_in_one_query(make_manager, osmnx_cache, monkeypatch):
+    manager = make_manager(offline_pois=True)
+    queries = []
+    query_features = manager._query_features
+    monkeypatch.setattr(manager, "_query_features", lambda tags: queries.append(tags) or query_features(tags))
+    manager.scan_all_locations()
+    assert queries == [merge_tags(POI_CATEGORIES)]
+    assert {category: len(manager.locations[category]) for category in ("schools", "markets", "parks", "healthcare")} \
+        == {"schools": 1, "markets": 1, "parks": 1, "healthcare": 1}
+    assert manager.locations["gyms"].empty
@@ -0,0 +1,33 @@
+import pytest
+import osm_integration
+from region_index import RegionIndex, bbox_from_point
+from conftest import GRID_CENTER
+
+
+def test_find_covering(tmp_path):
+    regions = RegionIndex(str(tmp_path))
+    regions.add("large", (48.85, 2.35), 5000, "drive")
+    regions.add("small", (48.85, 2.35), 2000, "drive")
+    regions.add("walk", (48.85, 2.35), 1000, "walk")
+
+    # Reloaded from disk, the smallest covering region of the same network type wins
+    regions = RegionIndex(str(tmp_path))
+    assert regions.find_covering((48.851, 2.351), 1000, "drive") == "small"
+    assert regions.find_covering((48.851, 2.351), 3000, "drive") == "large"
+    assert regions.find_covering((48.85, 2.35), 1020, "walk") == "walk"
+    assert regions.find_covering((48.85, 2.35), 1200, "walk") is None
+    assert regions.find_covering((48.90, 2.35), 1000, "drive") is None
+
+
+def test_manager_crops_covering_region(make_manager, monkeypatch):
+    covering = make_manager()
+    monkeypatch.setattr(osm_integration.ox, "graph_from_point", lambda *args, **kwargs: pytest.fail("Downloaded."))
+
+    cropped = osm_integration.OSMManager(GRID_CENTER, 300, cache_dir=covering.cache_dir)
+    south, west, north, east = bbox_from_point(GRID_CENTER, 300)
+    west_, south_, east_, north_ = cropped.bbox
+    assert 0 < len(cropped.csr_graph) < len(covering.csr_graph)
+    assert south <= south_ and west <= west_ and north_ <= north and east_ <= east
+    assert cropped.graph_digest != covering.graph_digest
+    # The networkx graph of a cropped region is the matching subgraph
+    assert sorted(cropped.graph.nodes) == sorted(cropped.csr_graph.node_ids.tolist())
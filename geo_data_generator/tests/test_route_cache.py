@@ -0,0 +1,44 @@
+from route_cache import RouteCache
+
+
+def route(origin, destination):
+    return [origin, destination], [0.0, float(destination - origin)]
+
+
+def test_get_and_lru_eviction():
+    cache = RouteCache("graph", maxsize=2)
+    assert cache.get(1, 2) is None
+    cache.put(1, 2, route(1, 2))
+    cache.put(1, 3, route(1, 3))
+    assert cache.get(1, 2) == route(1, 2)
+    # (1, 3) is now the least recently used route
+    cache.put(1, 4, route(1, 4))
+    assert cache.get(1, 3) is None
+    assert cache.get(1, 2) == route(1, 2) and cache.get(1, 4) == route(1, 4)
+    assert cache.get(1, 2, weight="travel_time") is None
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 3
+
+
+def test_persist_and_reload(tmp_path):
+    path = str(tmp_path / "graph.routes.pkl")
+    cache = RouteCache("graph", cache_path=path)
+    for destination in range(2, 6):
+        cache.put(1, destination, route(1, destination))
+    cache.save()
+
+    reloaded = RouteCache("graph", cache_path=path)
+    assert all(reloaded.get(1, destination) == route(1, destination) for destination in range(2, 6))
+    # The most recently used routes are kept when the reloaded cache is smaller
+    assert list(RouteCache("graph", maxsize=2, cache_path=path).routes) == list(cache.routes)[-2:]
+    # Routes computed on another graph are ignored
+    assert RouteCache("other graph", cache_path=path).get(1, 2) is None
+
+
+def test_manager_reloads_persisted_routes(make_manager):
+    manager = make_manager(persist_route_cache=True)
+    expected = manager.find_route(1000, 1143)
+    manager.save_route_cache()
+
+    reloaded = make_manager(persist_route_cache=True)
+    assert reloaded.route_cache.get(1000, 1143) == expected
@@ -0,0 +1,85 @@
+import random
+import networkx as nx
+import pytest
+from routing import CSRGraph, ROUTING_STRATEGIES
+from contraction import ContractionHierarchy
+
+
+@pytest.fixture(scope="module")
+def csr_graph(grid_graph):
+    return CSRGraph.from_networkx(grid_graph, weight="length")
+
+
+@pytest.fixture(scope="module")
+def hierarchy(csr_graph):
+    return ContractionHierarchy.build(csr_graph)
+
+
+def node_pairs(graph, count=150, seed=1):
+    rng = random.Random(seed)
+    nodes = [node for node in graph.nodes if node >= 1000]
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+
+def check_route(graph, source, target, route_nodes, cumulative_m):
+    """Check that a route follows graph edges and that its cumulative distances add up."""
+    assert route_nodes[0] == source and route_nodes[-1] == target
+    assert len(cumulative_m) == len(route_nodes) and cumulative_m[0] == 0
+    for i, (u, v) in enumerate(zip(route_nodes, route_nodes[1:])):
+        length = min(data["length"] for data in graph[u][v].values())
+        assert cumulative_m[i + 1] - cumulative_m[i] == pytest.approx(length, rel=1e-5)
+
+
+@pytest.mark.parametrize("strategy", ROUTING_STRATEGIES)
+def test_strategies_match_networkx(grid_graph, csr_graph, strategy):
+    for source, target in node_pairs(grid_graph):
+        try:
+            expected = nx.shortest_path_length(grid_graph, source, target, weight="length")
+        except nx.NetworkXNoPath:
+            with pytest.raises(nx.NetworkXNoPath):
+                csr_graph.shortest_path(source, target, strategy=strategy)
+            continue
+        route_nodes, cumulative_m = csr_graph.shortest_path(source, target, strategy=strategy)
+        check_route(grid_graph, source, target, route_nodes, cumulative_m)
+        assert cumulative_m[-1] == pytest.approx(expected, rel=1e-5)
+
+
+def test_contraction_hierarchy_matches_networkx(grid_graph, hierarchy):
+    for source, target in node_pairs(grid_graph):
+        try:
+            expected = nx.shortest_path_length(grid_graph, source, target, weight="length")
+        except nx.NetworkXNoPath:
+            with pytest.raises(nx.NetworkXNoPath):
+                hierarchy.shortest_path(source, target)
+            continue
+        route_nodes, cumulative_m = hierarchy.shortest_path(source, target)
+        check_route(grid_graph, source, target, route_nodes, cumulative_m)
+        assert cumulative_m[-1] == pytest.approx(expected, rel=1e-5)
+
+
+def test_contraction_hierarchy_cache(csr_graph, hierarchy, tmp_path):
+    path = str(tmp_path / "graph.ch.npz")
+    hierarchy.save(path)
+    loaded = ContractionHierarchy.load_or_build(csr_graph, path)
+    for source, target in [(1000, 1143), (1143, 1000), (1005, 1130)]:
+        assert loaded.shortest_path(source, target) == hierarchy.shortest_path(source, target)
+
+
+def test_shortest_path_between_matches_networkx(grid_graph, csr_graph):
+    sources, targets = [1000, 1011, 1050], [1130, 1143, 1070]
+    route_nodes, cumulative_m = csr_graph.shortest_path_between(sources, targets)
+    lengths = nx.multi_source_dijkstra_path_length(grid_graph, set(sources), weight="length")
+    assert route_nodes[0] in sources and route_nodes[-1] in targets
+    assert cumulative_m[-1] == pytest.approx(min(lengths[target] for target in targets), rel=1e-5)
+
+
+def test_unreachable_and_unknown_nodes(csr_graph, hierarchy):
+    for strategy in ROUTING_STRATEGIES:
+        with pytest.raises(nx.NetworkXNoPath):
+            csr_graph.shortest_path(1000, 1, strategy=strategy)
+        with pytest.raises(nx.NodeNotFound):
+            csr_graph.shortest_path(1000, 999999, strategy=strategy)
+    with pytest.raises(nx.NetworkXNoPath):
+        hierarchy.shortest_path(1, 1000)
+    with pytest.raises(nx.NodeNotFound):
+        hierarchy.shortest_path(999999, 1000)
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import pytest
+import osm_integration
+from conftest import GRID_CENTER, GRID_RADIUS
+
+
+@pytest.fixture
+def builds(make_manager, tmp_path, monkeypatch):
+    """OSMManager builds made through get_osm_manager, each taking a while."""
+    monkeypatch.setattr(osm_integration, "_managers", OrderedDict())
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    load_graph = osm_integration.OSMManager.load_graph
+
+    def slow_load_graph(manager):
+        calls.append(manager)
+        time.sleep(0.2)
+        load_graph(manager)
+
+    monkeypatch.setattr(osm_integration.OSMManager, "load_graph", slow_load_graph)
+    return calls
+
+
+def test_concurrent_callers_share_one_build(builds):
+    managers = []
+    threads = [
+        threading.Thread(target=lambda: managers.append(osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1 and all(manager is builds[0] for manager in managers)
+
+    # Equivalent arguments give the same manager, other options another one over the same cached graph
+    same = osm_integration.get_osm_manager(list(GRID_CENTER), GRID_RADIUS, network_type="drive", cache_dir="graph_cache")
+    assert same is builds[0]
+    other = osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS, routing_strategy="astar")
+    assert other is not same and other.cache_key == same.cache_key
+    assert os.listdir("graph_cache").count(f"{same.cache_key}.pkl") == 1
+
+
+def test_failed_build_is_retried(builds, monkeypatch):
+    with pytest.raises(ValueError):
+        osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS, routing_strategy="unknown")
+    load_graph = osm_integration.OSMManager.load_graph
+
+    def offline(manager):
+        raise ConnectionError("Overpass is unreachable")
+
+    monkeypatch.setattr(osm_integration.OSMManager, "load_graph", offline)
+    with pytest.raises(ConnectionError):
+        osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS)
+    monkeypatch.setattr(osm_integration.OSMManager, "load_graph", load_graph)
+    assert osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS) is builds[-1]
+
+
+def test_only_recent_managers_are_kept(builds):
+    for strategy in ("dijkstra", "astar", "bidirectional"):
+        for size in (10, 20):
+            osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS, routing_strategy=strategy, route_cache_size=size)
+    assert len(osm_integration._managers) == osm_integration.MAX_SHARED_MANAGERS
+    osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS, routing_strategy="bidirectional", route_cache_size=20)
+    assert len(builds) == 6
+
+
+def test_interrupted_build_releases_waiters(builds, monkeypatch):
+    started = threading.Event()
+    load_graph = osm_integration.OSMManager.load_graph
+
+    def interrupted_load_graph(manager):
+        started.set()
+        time.sleep(0.2)
+        raise KeyboardInterrupt
+
+    errors = []
+
+    def wait_for_manager():
+        started.wait()
+        try:
+            osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS)
+        except BaseException as e:
+            errors.append(e)
+
+    monkeypatch.setattr(osm_integration.OSMManager, "load_graph", interrupted_load_graph)
+    waiter = threading.Thread(target=wait_for_manager)
+    waiter.start()
+    with pytest.raises(KeyboardInterrupt):
+        osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS)
+    waiter.join(timeout=5)
+    assert not waiter.is_alive() and [type(e) for e in errors] == [KeyboardInterrupt]
+
+    # The interrupted build is not kept
+    monkeypatch.setattr(osm_integration.OSMManager, "load_graph", load_graph)
+    assert osm_integration.get_osm_manager(GRID_CENTER, GRID_RADIUS) is builds[-1]
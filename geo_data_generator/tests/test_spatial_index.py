@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from geopy.distance import great_circle
+from spatial_index import NodeIndex
+
+
+@pytest.fixture(scope="module")
+def node_index(grid_graph):
+    nodes = list(grid_graph.nodes)
+    return NodeIndex(nodes, [grid_graph.nodes[n]["y"] for n in nodes], [grid_graph.nodes[n]["x"] for n in nodes])
+
+
+def random_points(count=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.uniform(48.795, 48.865, count), rng.uniform(2.295, 2.37, count)))
+
+
+def test_query_matches_brute_force(grid_graph, node_index):
+    points = random_points()
+    node_ids, distances_m = node_index.query(points)
+    for point, node, distance_m in zip(points, node_ids, distances_m):
+        distances = {n: great_circle(point, (data["y"], data["x"])).meters for n, data in grid_graph.nodes(data=True)}
+        assert distances[node] == pytest.approx(min(distances.values()), abs=1e-3)
+        assert distance_m == pytest.approx(distances[node], rel=1e-6)
+
+
+def test_manager_snaps_points_to_nearest_nodes(make_manager, node_index):
+    manager = make_manager()
+    points = random_points(50, seed=1)
+    assert manager.get_nearest_nodes(points) == node_index.query(points)[0]
+    assert manager.get_nearest_node(tuple(points[0])) == node_index.query(points[:1])[0][0]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import shapely
+from geopy.distance import great_circle
+from models.waypoint_manager import WAYPOINT_CONFIGS, PopulationWaypointAssigner
+from poi_index import POIIndex
+from poi_scan import POI_CATEGORIES
+
+
+@pytest.fixture
+def manager(make_manager):
+    manager = make_manager()
+    rng = np.random.default_rng(0)
+    locations = {
+        "residential": [shapely.box(2.351, 48.851, 2.354, 48.853), shapely.box(2.36, 48.856, 2.362, 48.859)],
+        "workplaces": [shapely.box(2.363, 48.851, 2.365, 48.852)],
+        "schools": list(shapely.points(rng.uniform(2.35, 2.366, 8), rng.uniform(48.85, 48.861, 8))),
+        "parks": [shapely.box(2.355, 48.855, 2.356, 48.856), shapely.Point(2.357, 48.859)],
+        "healthcare": list(shapely.points(rng.uniform(2.35, 2.366, 5), rng.uniform(48.85, 48.861, 5))),
+        "markets": [shapely.Point(2.352, 48.86)],
+    }
+    # Every category is set, so nothing is scanned; gyms and play areas have no locations
+    for category in POI_CATEGORIES:
+        manager.poi_index.set(category, POIIndex(locations.get(category, [])))
+    return manager
+
+
+def test_assign_population(manager):
+    counts = {"child": 5, "adult": 7, "older": 3}
+    population = PopulationWaypointAssigner(rng=np.random.default_rng(1)).assign(manager, counts)
+    assert {person_type: len(people) for person_type, people in population.items()} == counts
+
+    residential = shapely.union_all(manager.poi_index["residential"].geometry)
+    min_x, min_y, max_x, max_y = manager.bbox
+    for person_type, people in population.items():
+        for waypoints in people:
+            assert list(waypoints) == list(WAYPOINT_CONFIGS[person_type])
+            assert residential.covers(shapely.Point(waypoints["home"][::-1]))
+            for waypoint, config in WAYPOINT_CONFIGS[person_type].items():
+                reference = config.get("nearest_to")
+                index = manager.poi_index[config["category"]]
+                if not len(index):
+                    # No locations: a point of the graph's bounding box
+                    lat, lon = waypoints[waypoint]
+                    assert min_y <= lat <= max_y and min_x <= lon <= max_x
+                elif reference:
+                    distances = [great_circle(waypoints[reference], centroid).meters for centroid in index.centroids]
+                    assert waypoints[waypoint] == tuple(index.centroids[int(np.argmin(distances))])
+
+    # Seeded assignments are reproducible
+    assert PopulationWaypointAssigner(rng=np.random.default_rng(1)).assign(manager, counts) == population
+
+
+def test_unknown_person_type(manager):
+    with pytest.raises(ValueError):
+        PopulationWaypointAssigner().assign(manager, {"robot": 1})